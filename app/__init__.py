@@ -1,5 +1,6 @@
 import os
 import logging
+import click
 from logging.handlers import RotatingFileHandler
 from flask import Flask
 from dotenv import load_dotenv
@@ -9,8 +10,14 @@ from flask_limiter.util import get_remote_address
 
 from .models import db, migrate, JobLog
 from .auth import login_manager
-from .scheduler import init_scheduler
 from .extensions import limiter
+from .sqlprof import init_sql_profiling
+from .user_search import init_user_search
+from .analytics import init_analytics
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+BASELINE_REVISION = "86903bd9f632"  # schema of the first release (see migrations/versions)
+
 
 def _setup_logging(app: Flask):
     # Console logs (docker)
@@ -43,6 +50,34 @@ def log_db(level: str, action: str, message: str, booking_id=None, **ctx):
         logging.getLogger(__name__).warning("Failed to write JobLog: %s", e)
 
 
+def _schema_is_current() -> bool:
+    """
+    True when the database is at the migration head. Reads alembic_version
+    and the version scripts only, so restarts skip loading the migration env.
+    """
+    from alembic.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    heads = set(ScriptDirectory(MIGRATIONS_DIR).get_heads())
+    with db.engine.connect() as conn:
+        return set(MigrationContext.configure(conn).get_current_heads()) == heads
+
+
+def _upgrade_schema():
+    """
+    Apply pending migrations. Databases created by db.create_all() before
+    migrations existed have no alembic_version table: stamp those at the
+    baseline revision first so only the later changes run.
+    """
+    from flask_migrate import stamp, upgrade
+    from sqlalchemy import inspect
+
+    tables = set(inspect(db.engine).get_table_names())
+    if tables and "alembic_version" not in tables:
+        stamp(revision=BASELINE_REVISION)
+    upgrade()
+
+
 def create_app():
     load_dotenv()
     app = Flask(__name__, template_folder="templates", static_folder="static")
@@ -51,6 +86,23 @@ def create_app():
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     app.config["SITE_NAME"] = os.environ.get("SITE_NAME", "Interview Booking")
     app.config["SCHEDULER_ENABLED"] = os.environ.get("SCHEDULER_ENABLED", "1") == "1"
+    # all: web + scheduler (default) | web: HTTP only, never loads scheduler/Azure modules
+    # worker: scheduler only, no blueprints (see app/worker.py)
+    app.config["APP_MODE"] = os.environ.get("APP_MODE", "all")
+    # How often the worker picks up bookings approved / sent to "Run now" by web-only
+    # processes (0 = never). Defaults to 60s for split deployments (web processes read
+    # it for their messages) and off for APP_MODE=all, where each process schedules
+    # what it approves itself.
+    app.config["SCHEDULER_SYNC_SECONDS"] = int(os.environ.get(
+        "SCHEDULER_SYNC_SECONDS", "0" if app.config["APP_MODE"] == "all" else "60"))
+    app.config["VM_POOL_SIZE"] = int(os.environ.get("VM_POOL_SIZE", "1"))  # for utilization in /admin/analytics
+
+    # Opt-in SQL profiling (see app/sqlprof.py)
+    app.config["SQL_PROFILE"] = os.environ.get("SQL_PROFILE", "0") == "1"
+    app.config["SQL_SLOW_MS"] = float(os.environ.get("SQL_SLOW_MS", "200"))
+    app.config["SQL_SLOW_SAMPLE_RATE"] = float(os.environ.get("SQL_SLOW_SAMPLE_RATE", "1.0"))
+    app.config["SQL_PROFILE_TOP"] = int(os.environ.get("SQL_PROFILE_TOP", "5"))
+    app.config["SQL_PROFILE_MAX_QUERIES"] = int(os.environ.get("SQL_PROFILE_MAX_QUERIES", "50"))
 
     _setup_logging(app)
     app.log_db = log_db  # allow current_app.log_db(...)
@@ -70,21 +122,29 @@ def create_app():
 
     # Core extensions
     db.init_app(app)
-    migrate.init_app(app, db)
+    # Migrations ship inside the package (the image only copies app/); batch mode for SQLite ALTERs
+    migrate.init_app(app, db, directory=MIGRATIONS_DIR, render_as_batch=True)
     login_manager.init_app(app)
+    init_sql_profiling(app)
+    init_user_search()
+    init_analytics()
 
     # Blueprints
-    from .auth import bp as auth_bp
-    from .bookings import bp as booking_bp
-    from .admin import bp as admin_bp
-    app.register_blueprint(auth_bp)
-    app.register_blueprint(booking_bp)
-    app.register_blueprint(admin_bp)
+    if app.config["APP_MODE"] != "worker":
+        from .auth import bp as auth_bp
+        from .bookings import bp as booking_bp
+        from .admin import bp as admin_bp
+        app.register_blueprint(auth_bp)
+        app.register_blueprint(booking_bp)
+        app.register_blueprint(admin_bp)
 
     # Scheduler
     # Note: With gunicorn -w 3, each worker will run create_app(). If you want only one
-    # scheduler instance, either run with -w 1 or gate this by an env var (e.g. RUN_SCHEDULER=1).
-    if app.config["SCHEDULER_ENABLED"] and os.environ.get("RUN_SCHEDULER", "1") == "1":
+    # scheduler instance, either run with -w 1 or gate this by an env var (e.g. RUN_SCHEDULER=1),
+    # or run the web tier with APP_MODE=web and a single `python -m app.worker`.
+    if (app.config["APP_MODE"] != "web" and app.config["SCHEDULER_ENABLED"]
+            and os.environ.get("RUN_SCHEDULER", "1") == "1"):
+        from .scheduler import init_scheduler
         init_scheduler(app)
 
     @app.get("/health")
@@ -96,15 +156,18 @@ def create_app():
     def db_init():
         from .models import User
         from werkzeug.security import generate_password_hash
-        from .crypto import hmac_index, encrypt_field
+        from .crypto import hmac_index, hmac_candidates, encrypt_field
 
         with app.app_context():
-            db.create_all()  # creates new tables like job_log if missing
+            if _schema_is_current():
+                print("Schema up to date")
+            else:
+                _upgrade_schema()
             admin_user = os.environ.get("ADMIN_USERNAME", "interviewadmin")
             admin_pass = os.environ.get("ADMIN_PASSWORD", "ChangeMeNow!")
             admin_email = os.environ.get("ADMIN_EMAIL", "admin@example.com")
 
-            existing = User.query.filter_by(username_hmac=hmac_index(admin_user)).first()
+            existing = User.query.filter(User.username_hmac.in_(hmac_candidates(admin_user))).first()
             if not existing:
                 u = User(
                     username_enc=encrypt_field(admin_user),
@@ -120,4 +183,50 @@ def create_app():
             else:
                 print("Admin user exists")
 
+    # CLI: re-encrypt / re-index users after a key rotation (see app/crypto.py)
+    @app.cli.command("rotate_keys")
+    @click.option("--chunk-size", default=500, show_default=True, help="Users per chunk/transaction.")
+    @click.option("--sleep", "pause", default=0.0, show_default=True, help="Seconds to pause between chunks.")
+    @click.option("--max-rows-per-sec", default=None, type=float, help="Throttle on scanned users.")
+    @click.option("--restart", is_flag=True, help="Ignore the last checkpoint and start from the first user.")
+    def rotate_keys(chunk_size, pause, max_rows_per_sec, restart):
+        from .crypto import has_old_keys
+        from .key_rotation import rotate_user_keys
+
+        if not has_old_keys():
+            print("No old keys configured (DATA_ENC_OLD_KEYS / HMAC_OLD_KEYS); nothing to rotate")
+            return
+
+        def progress(st):
+            print(f"scanned={st['scanned']} updated={st['updated']} remaining={st['remaining']} "
+                  f"last_id={st['last_id']} elapsed={st['elapsed_s']}s")
+
+        with app.app_context():
+            stats = rotate_user_keys(chunk_size=chunk_size, pause=pause, max_rows_per_sec=max_rows_per_sec,
+                                     restart=restart, progress=progress)
+        print(f"Done: {stats['updated']} of {stats['scanned']} users rewritten with the current keys")
+
+    # CLI: (re)build blind-index search tokens for existing users
+    @app.cli.command("search_backfill")
+    @click.option("--chunk-size", default=1000, show_default=True, help="Users per chunk/transaction.")
+    def search_backfill(chunk_size):
+        from .user_search import backfill_tokens
+
+        def progress(st):
+            print(f"users={st['users']} tokens={st['tokens']} last_id={st['last_id']} elapsed={st['elapsed_s']}s")
+
+        with app.app_context():
+            stats = backfill_tokens(chunk_size=chunk_size, progress=progress)
+        print(f"Done: indexed {stats['users']} users ({stats['tokens']} tokens)")
+
+    # CLI: recompute booking analytics rollups (after bulk imports / first deploy)
+    @app.cli.command("analytics_rebuild")
+    @click.option("--chunk-size", default=5000, show_default=True, help="Bookings read per chunk.")
+    def analytics_rebuild(chunk_size):
+        from .analytics import rebuild_rollups
+
+        with app.app_context():
+            stats = rebuild_rollups(chunk_size=chunk_size)
+        print(f"Done: {stats['bookings']} bookings -> {stats['days']} daily rows in {stats['elapsed_s']}s")
+
     return app
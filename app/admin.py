@@ -1,7 +1,13 @@
-from flask import Blueprint, render_template, redirect, url_for, flash
+import csv
+import io
+from datetime import date, datetime, timedelta, timezone
+
+from flask import Blueprint, render_template, redirect, url_for, flash, current_app, request, jsonify, Response
 from flask_login import login_required, current_user
+from sqlalchemy.orm import joinedload
 from .models import db, Booking, JobLog
-from .scheduler import run_booking_now
+from .user_search import FIELDS, search_users
+from . import analytics
 
 bp = Blueprint("admin", __name__, url_prefix="/admin")
 
@@ -19,7 +25,7 @@ def _guard_admin():
 @bp.get("/")
 @login_required
 def admin_home():
-    bookings = Booking.query.order_by(Booking.start_at.desc()).all()
+    bookings = Booking.query.options(joinedload(Booking.user)).order_by(Booking.start_at_utc.desc()).all()
     return render_template("admin.html", bookings=bookings)
 
 
@@ -30,9 +36,82 @@ def admin_logs():
     return render_template("logs.html", logs=logs)
 
 
+@bp.get("/users")
+@login_required
+def admin_users():
+    q = request.args.get("q", "").strip()
+    field = request.args.get("field") or None
+    if field not in FIELDS:
+        field = None
+    users, truncated = search_users(q, field=field) if q else ([], False)
+    return render_template("admin_users.html", q=q, field=field, users=users, truncated=truncated)
+
+
+def _analytics_args():
+    today = datetime.now(timezone.utc).date()
+
+    def parse(name, default):
+        try:
+            return date.fromisoformat(request.args[name])
+        except (KeyError, ValueError):
+            return default
+
+    end = parse("to", today)
+    start = parse("from", end - timedelta(days=89))
+    group = "month" if request.args.get("group") == "month" else "day"
+    return start, end, group
+
+
+def _analytics_rows():
+    start, end, group = _analytics_args()
+    rows = analytics.report(start, end, group=group, pool_size=current_app.config["VM_POOL_SIZE"])
+    return start, end, group, rows
+
+
+@bp.get("/analytics")
+@login_required
+def admin_analytics():
+    start, end, group, rows = _analytics_rows()
+    return render_template("analytics.html", start=start, end=end, group=group, rows=rows)
+
+
+@bp.get("/analytics.json")
+@login_required
+def admin_analytics_json():
+    start, end, group, rows = _analytics_rows()
+    return jsonify({"from": start.isoformat(), "to": end.isoformat(), "group": group, "rows": rows})
+
+
+@bp.get("/analytics.csv")
+@login_required
+def admin_analytics_csv():
+    start, end, group, rows = _analytics_rows()
+    buf = io.StringIO()
+    if rows:
+        writer = csv.DictWriter(buf, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    filename = f"booking-analytics-{start}-{end}-{group}.csv"
+    return Response(buf.getvalue(), mimetype="text/csv",
+                    headers={"Content-Disposition": f"attachment; filename={filename}"})
+
+
 @bp.post("/bookings/<int:booking_id>/run-now")
 @login_required
 def admin_run_now(booking_id):
+    if "scheduler" not in current_app.extensions:
+        # Web-only process (APP_MODE=web): leave the request for the worker's sync job
+        sync_every = current_app.config["SCHEDULER_SYNC_SECONDS"]
+        if sync_every <= 0:
+            flash("Run now needs the worker's sync job (SCHEDULER_SYNC_SECONDS > 0).", "warning")
+            return redirect(url_for("admin.admin_home"))
+        b = Booking.query.get_or_404(booking_id)
+        b.run_requested_at = datetime.now(timezone.utc)
+        db.session.commit()
+        flash(f"Run requested; the worker will start booking {b.id} within {sync_every}s.", "success")
+        return redirect(url_for("admin.admin_home"))
+
+    from .scheduler import run_booking_now
     run_booking_now(booking_id)
     flash("Job queued to run immediately", "success")
     return redirect(url_for("admin.admin_home"))
@@ -0,0 +1,268 @@
+# app/analytics.py
+"""
+Booking / VM-utilization analytics backed by the booking_daily_stats rollup.
+
+Every flush that inserts, updates or deletes a Booking computes what the row
+contributed to the rollup before and after the change and applies only the
+difference (an upsert per touched day, in the same transaction). Reports
+then read at most one row per day, no matter how many bookings exist.
+Maxima only ever grow between rebuilds (a deleted outlier is not retracted).
+Bulk writes bypass the ORM; `flask analytics_rebuild` recomputes the table
+from scratch.
+"""
+from __future__ import annotations
+import logging
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.orm import Session
+
+from .models import db, Booking, BookingDailyStats, ACTIVE_STATUSES
+from .utils import keyset_chunks
+
+log = logging.getLogger(__name__)
+
+BOOKED = ACTIVE_STATUSES
+TRACKED = ("status", "start_at_utc", "end_at_utc", "started_at_utc", "created_at", "approved_at")
+SUM_COLS = ("requested", "approved", "rejected", "failed", "booked", "booked_hours",
+            "approval_latency_sum_s", "start_delay_count", "start_delay_sum_s")
+INT_COLS = {"requested", "approved", "rejected", "failed", "booked", "start_delay_count"}
+MAX_COLS = ("approval_latency_max_s", "start_delay_max_s")
+
+
+def _utc(dt: datetime | None) -> datetime | None:
+    # SQLite hands back naive datetimes; everything we store is UTC
+    if dt is None or dt.tzinfo is not None:
+        return dt
+    return dt.replace(tzinfo=timezone.utc)
+
+
+def _split_hours(start: datetime, end: datetime):
+    """Yield (day, hours) for the part of [start, end) that falls on each UTC day."""
+    cur = start
+    while cur < end:
+        next_midnight = datetime.combine(cur.date() + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+        stop = min(end, next_midnight)
+        yield cur.date(), (stop - cur).total_seconds() / 3600
+        cur = stop
+
+
+def _contributions(snap: dict | None):
+    """(sums, maxes) one booking snapshot adds to the rollup, keyed by day."""
+    sums = defaultdict(lambda: defaultdict(float))
+    maxes = defaultdict(dict)
+    if snap is None:
+        return sums, maxes
+
+    status = snap["status"]
+    start, end = _utc(snap["start_at_utc"]), _utc(snap["end_at_utc"])
+    created, approved_at, started = _utc(snap["created_at"]), _utc(snap["approved_at"]), _utc(snap["started_at_utc"])
+
+    if created:
+        sums[created.date()]["requested"] += 1
+    if approved_at:
+        sums[approved_at.date()]["approved"] += 1
+        if created:
+            latency = max(0.0, (approved_at - created).total_seconds())
+            sums[approved_at.date()]["approval_latency_sum_s"] += latency
+            maxes[approved_at.date()]["approval_latency_max_s"] = latency
+    if start:
+        day = start.date()
+        if status in BOOKED and end:
+            sums[day]["booked"] += 1
+            for d, hours in _split_hours(start, end):
+                sums[d]["booked_hours"] += hours
+        elif status in ("failed", "rejected"):
+            sums[day][status] += 1
+        if started:
+            delay = max(0.0, (started - start).total_seconds())
+            sums[day]["start_delay_count"] += 1
+            sums[day]["start_delay_sum_s"] += delay
+            maxes[day]["start_delay_max_s"] = delay
+    return sums, maxes
+
+
+def _snapshot(b: Booking, old: bool = False) -> dict:
+    """Tracked attribute values, either current or as last loaded/flushed (old=True)."""
+    if not old:
+        return {name: getattr(b, name) for name in TRACKED}
+    state = db.inspect(b)
+    snap = {}
+    for name in TRACKED:
+        hist = state.attrs[name].history
+        if hist.deleted:
+            snap[name] = hist.deleted[0]
+        elif hist.unchanged:
+            snap[name] = hist.unchanged[0]
+        else:
+            snap[name] = None if hist.added else getattr(b, name)
+    return snap
+
+
+def _upsert(conn, day: date, sums: dict, maxes: dict):
+    values = {**{c: 0 for c in (*SUM_COLS, *MAX_COLS)}, "day": day, **sums, **maxes}
+    dialect = conn.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            greatest = func.greatest
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            greatest = func.max  # scalar max(a, b) in SQLite
+        t = BookingDailyStats.__table__
+        stmt = dialect_insert(t).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[t.c.day],
+            set_={**{c: t.c[c] + stmt.excluded[c] for c in sums},
+                  **{c: greatest(t.c[c], stmt.excluded[c]) for c in maxes}},
+        )
+        conn.execute(stmt)
+        return
+
+    # Generic fallback: read-modify-write inside the caller's transaction
+    row = conn.execute(select(BookingDailyStats.__table__).where(BookingDailyStats.day == day)).mappings().first()
+    if row is None:
+        conn.execute(insert(BookingDailyStats), [values])
+        return
+    new = {c: row[c] + v for c, v in sums.items()}
+    new.update({c: max(row[c], v) for c, v in maxes.items()})
+    conn.execute(BookingDailyStats.__table__.update().where(BookingDailyStats.day == day).values(**new))
+
+
+def _apply(conn, before: dict | None, after: dict | None):
+    old_sums, _ = _contributions(before)
+    new_sums, new_maxes = _contributions(after)
+    for day in set(old_sums) | set(new_sums) | set(new_maxes):
+        sums = {}
+        for col in set(old_sums.get(day, {})) | set(new_sums.get(day, {})):
+            delta = new_sums.get(day, {}).get(col, 0.0) - old_sums.get(day, {}).get(col, 0.0)
+            if abs(delta) > 1e-9:
+                sums[col] = int(round(delta)) if col in INT_COLS else delta
+        maxes = new_maxes.get(day, {})
+        if sums or maxes:
+            _upsert(conn, day, sums, maxes)
+
+
+def _sync_after_flush(session, flush_context):
+    new = [o for o in session.new if isinstance(o, Booking)]
+    dirty = [o for o in session.dirty if isinstance(o, Booking)
+             and any(db.inspect(o).attrs[n].history.has_changes() for n in TRACKED)]
+    deleted = [o for o in session.deleted if isinstance(o, Booking)]
+    if not (new or dirty or deleted):
+        return
+
+    conn = session.connection()
+    for b in new:
+        _apply(conn, None, _snapshot(b))
+    for b in dirty:
+        _apply(conn, _snapshot(b, old=True), _snapshot(b))
+    for b in deleted:
+        _apply(conn, _snapshot(b, old=True), None)
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    return value
+
+
+def init_analytics():
+    """Hook rollup maintenance into Booking flushes (no-op if already installed)."""
+    if not event.contains(Session, "after_flush", _sync_after_flush):
+        event.listen(Session, "after_flush", _sync_after_flush)
+        # Load the previous value on assignment even if the attribute was expired,
+        # so the old contribution can always be subtracted.
+        for name in TRACKED:
+            event.listen(getattr(Booking, name), "set", _keep_old_value, active_history=True, retval=True)
+
+
+# --- Rebuild -----------------------------------------------------------------
+
+def rebuild_rollups(chunk_size: int = 5000, progress=None) -> dict:
+    """Recompute booking_daily_stats from all bookings and replace it in one transaction."""
+    started = time.perf_counter()
+    sums = defaultdict(lambda: defaultdict(float))
+    maxes = defaultdict(lambda: defaultdict(float))
+    cols = [Booking.id] + [getattr(Booking, n) for n in TRACKED]
+    scanned = 0
+    for rows in keyset_chunks(cols, Booking.id, chunk_size):
+        for r in rows:
+            s, m = _contributions({n: getattr(r, n) for n in TRACKED})
+            for day, cols_ in s.items():
+                for c, v in cols_.items():
+                    sums[day][c] += v
+            for day, cols_ in m.items():
+                for c, v in cols_.items():
+                    maxes[day][c] = max(maxes[day][c], v)
+        scanned += len(rows)
+        if progress:
+            progress({"bookings": scanned, "days": len(sums)})
+
+    out = []
+    for day in sorted(set(sums) | set(maxes)):
+        row = {"day": day, **{c: 0 for c in (*SUM_COLS, *MAX_COLS)}}
+        row.update({c: int(round(v)) if c in INT_COLS else v for c, v in sums[day].items()})
+        row.update(maxes[day])
+        out.append(row)
+
+    db.session.execute(delete(BookingDailyStats))
+    if out:
+        db.session.execute(insert(BookingDailyStats), out)
+    db.session.commit()
+    stats = {"bookings": scanned, "days": len(out), "elapsed_s": round(time.perf_counter() - started, 2)}
+    log.info("Analytics rollup rebuilt: %s", stats)
+    return stats
+
+
+# --- Reporting ---------------------------------------------------------------
+
+def _bucket(day: date, group: str) -> str:
+    return day.strftime("%Y-%m") if group == "month" else day.isoformat()
+
+
+def report(start: date, end: date, group: str = "day", pool_size: int = 1) -> list[dict]:
+    """
+    Rollup rows for [start, end] (inclusive), grouped by day or month, with derived
+    averages and utilization (booked_hours / (24h * pool_size * days in bucket)).
+    """
+    rows = (BookingDailyStats.query
+            .filter(BookingDailyStats.day >= start, BookingDailyStats.day <= end)
+            .order_by(BookingDailyStats.day)
+            .all())
+
+    buckets: dict[str, dict] = {}
+    for r in rows:
+        key = _bucket(r.day, group)
+        b = buckets.setdefault(key, {"period": key, "days": 0, **{c: 0 for c in (*SUM_COLS, *MAX_COLS)}})
+        b["days"] += 1
+        for c in SUM_COLS:
+            b[c] += getattr(r, c)
+        for c in MAX_COLS:
+            b[c] = max(b[c], getattr(r, c))
+
+    out = []
+    for key in sorted(buckets):
+        b = buckets[key]
+        if group == "month":
+            first = datetime.strptime(key, "%Y-%m").date()
+            nxt = (first.replace(day=28) + timedelta(days=4)).replace(day=1)
+            period_days = (min(nxt - timedelta(days=1), end) - max(first, start)).days + 1
+        else:
+            period_days = 1
+        out.append({
+            "period": key,
+            "requested": b["requested"],
+            "approved": b["approved"],
+            "rejected": b["rejected"],
+            "failed": b["failed"],
+            "booked": b["booked"],
+            "booked_hours": round(b["booked_hours"], 2),
+            "utilization_pct": round(100 * b["booked_hours"] / (24 * pool_size * period_days), 1),
+            "avg_approval_latency_s": round(b["approval_latency_sum_s"] / b["approved"], 1) if b["approved"] else None,
+            "max_approval_latency_s": round(b["approval_latency_max_s"], 1),
+            "starts": b["start_delay_count"],
+            "avg_start_delay_s": (round(b["start_delay_sum_s"] / b["start_delay_count"], 1)
+                                  if b["start_delay_count"] else None),
+            "max_start_delay_s": round(b["start_delay_max_s"], 1),
+        })
+    return out
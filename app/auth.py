@@ -1,10 +1,10 @@
 # app/auth.py
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from werkzeug.security import check_password_hash
+from werkzeug.security import check_password_hash, generate_password_hash
 from .models import db, User
-from .forms import LoginForm
-from .crypto import hmac_index
+from .forms import LoginForm, RegisterForm
+from .crypto import hmac_index, hmac_candidates, encrypt_field
 from .extensions import limiter  # use the shared limiter instance
 
 bp = Blueprint("auth", __name__)
@@ -32,7 +32,7 @@ def login():
         username = (form.username.data or "").strip()
         password = form.password.data or ""
 
-        user = User.query.filter_by(username_hmac=hmac_index(username)).first()
+        user = User.query.filter(User.username_hmac.in_(hmac_candidates(username))).first()
         if user and check_password_hash(user.password_hash, password):
             login_user(user, remember=form.remember_me.data if hasattr(form, "remember_me") else False)
             flash("Welcome back!", "success")
@@ -45,6 +45,36 @@ def login():
     # Form failed validation (e.g., CSRF)
     return render_template("login.html", form=form), 400
 
+@bp.route("/register", methods=["GET", "POST"])
+@limiter.limit("5/minute", methods=["POST"])
+def register():
+    form = RegisterForm()
+    if form.validate_on_submit():
+        username = form.username.data.strip()
+        email = form.email.data.strip()
+
+        taken = User.query.filter(
+            User.username_hmac.in_(hmac_candidates(username)) | User.email_hmac.in_(hmac_candidates(email))
+        ).first()
+        if taken:
+            flash("Username or email is already registered.", "warning")
+            return render_template("register.html", form=form), 409
+
+        u = User(
+            username_enc=encrypt_field(username),
+            email_enc=encrypt_field(email),
+            username_hmac=hmac_index(username),
+            email_hmac=hmac_index(email),
+            password_hash=generate_password_hash(form.password.data),
+            role="user",
+        )
+        db.session.add(u)
+        db.session.commit()
+        flash("Account created. Please log in.", "success")
+        return redirect(url_for("auth.login"))
+
+    return render_template("register.html", form=form)
+
 @bp.route("/logout")
 @login_required
 def logout():
@@ -5,9 +5,9 @@ from datetime import datetime, timedelta
 import pytz
 from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, current_app
 from flask_login import login_required, current_user
-from .models import db, Booking
+from .models import db, Booking, ACTIVE_STATUSES
 from .forms import BookingForm
-from .scheduler import schedule_booking_job
+from .utils import admin_required
 
 bp = Blueprint("booking", __name__)
 
@@ -18,6 +18,28 @@ MIN_DURATION_MINUTES = int(os.getenv("MIN_DURATION_MINUTES", "30"))
 MAX_DURATION_HOURS = float(os.getenv("MAX_DURATION_HOURS", "6"))
 
 
+def _schedule_start(b: Booking) -> bool:
+    """
+    Schedule the start job in this process if it runs the scheduler and return
+    True. Otherwise (APP_MODE=web) return False: the worker picks approved
+    bookings up on its next sync.
+    """
+    if "scheduler" not in current_app.extensions:
+        current_app.logger.info("[BOOK] No scheduler in this process; booking_id=%s left for the worker", b.id)
+        return False
+    from .scheduler import schedule_booking_job
+    schedule_booking_job(b.id, b.start_at_utc)
+    return True
+
+
+def _worker_note() -> str:
+    """Flash suffix for bookings left to the worker's sync job."""
+    sync_every = current_app.config["SCHEDULER_SYNC_SECONDS"]
+    if sync_every <= 0:
+        return "but SCHEDULER_SYNC_SECONDS=0, so no worker will pick it up"
+    return f"the worker will schedule it within {sync_every}s"
+
+
 @bp.route("/")
 def index():
     return render_template("index.html")
@@ -35,21 +57,21 @@ def calendar_view():
 def api_availability():
     """
     FullCalendar feed.
-    - Non-admins: just see 'Unavailable' for approved/running blocks
+    - Non-admins: just see 'Unavailable' for approved/starting/running blocks
     - Admins: see username + status for all bookings
     """
     events = []
-    # Show everything to admins; show only 'approved'/'running' as blocks to users
+    # Show everything to admins; show only slot-holding bookings as blocks to users
     if current_user.is_admin():
         qs = Booking.query.order_by(Booking.start_at_utc.asc()).all()
     else:
-        qs = Booking.query.filter(Booking.status.in_(("approved", "running")))\
+        qs = Booking.query.filter(Booking.status.in_(ACTIVE_STATUSES))\
                           .order_by(Booking.start_at_utc.asc()).all()
 
     for b in qs:
         if current_user.is_admin():
             title = f"{b.user.username} ({b.status})"
-            color = "#4f46e5" if b.status in ("approved", "running") else "#9ca3af"
+            color = "#4f46e5" if b.status in ACTIVE_STATUSES else "#9ca3af"
         else:
             title = "Unavailable"
             color = "#8888ff"
@@ -101,9 +123,9 @@ def book():
             flash(f"Maximum duration is {MAX_DURATION_HOURS:g} hours.", "warning")
             return redirect(url_for("booking.book"))
 
-        # Overlap check against approved/running bookings
+        # Overlap check against bookings that hold their slot
         overlap = Booking.query.filter(
-            Booking.status.in_(("approved", "running")),
+            Booking.status.in_(ACTIVE_STATUSES),
             Booking.end_at_utc > start_utc,
             Booking.start_at_utc < end_utc
         ).first()
@@ -120,7 +142,8 @@ def book():
             user_id=current_user.id,
             start_at_utc=start_utc,
             end_at_utc=end_utc,
-            status=status
+            status=status,
+            approved_at=datetime.now(pytz.utc) if status == "approved" else None,
         )
         db.session.add(b)
         db.session.commit()
@@ -128,12 +151,14 @@ def book():
         # If approved now, schedule the job right away
         if status == "approved":
             try:
-                schedule_booking_job(b.id, b.start_at_utc)
-                current_app.logger.info(
-                    "[BOOK] Auto-approved & scheduled booking_id=%s for %s",
-                    b.id, b.start_at_utc.isoformat()
-                )
-                flash("Slot booked and scheduled.", "success")
+                if _schedule_start(b):
+                    current_app.logger.info(
+                        "[BOOK] Auto-approved & scheduled booking_id=%s for %s",
+                        b.id, b.start_at_utc.isoformat()
+                    )
+                    flash("Slot booked and scheduled.", "success")
+                else:
+                    flash(f"Slot booked; {_worker_note()}.", "success")
             except Exception as e:
                 current_app.logger.exception("[BOOK] Failed to schedule booking %s: %s", b.id, e)
                 flash("Booking saved, but scheduling failed. Check logs.", "danger")
@@ -143,3 +168,42 @@ def book():
         return redirect(url_for("booking.calendar_view"))
 
     return render_template("book.html", form=form)
+
+
+@bp.post("/bookings/<int:booking_id>/approve")
+@login_required
+@admin_required
+def approve_booking(booking_id):
+    b = Booking.query.get_or_404(booking_id)
+    if b.status != "pending":
+        flash(f"Booking {b.id} is already {b.status}.", "warning")
+        return redirect(url_for("admin.admin_home"))
+
+    b.status = "approved"
+    b.approved = True
+    b.approved_at = datetime.now(pytz.utc)
+    db.session.commit()
+    try:
+        if _schedule_start(b):
+            flash(f"Booking {b.id} approved and scheduled.", "success")
+        else:
+            flash(f"Booking {b.id} approved; {_worker_note()}.", "success")
+    except Exception as e:
+        current_app.logger.exception("[BOOK] Failed to schedule booking %s: %s", b.id, e)
+        flash("Booking approved, but scheduling failed. Check logs.", "danger")
+    return redirect(url_for("admin.admin_home"))
+
+
+@bp.post("/bookings/<int:booking_id>/reject")
+@login_required
+@admin_required
+def reject_booking(booking_id):
+    b = Booking.query.get_or_404(booking_id)
+    if b.status != "pending":
+        flash(f"Booking {b.id} is already {b.status}.", "warning")
+        return redirect(url_for("admin.admin_home"))
+
+    b.status = "rejected"
+    db.session.commit()
+    flash(f"Booking {b.id} rejected.", "info")
+    return redirect(url_for("admin.admin_home"))
@@ -4,38 +4,46 @@ import os
 from hashlib import sha256
 from typing import Union
 
-from cryptography.fernet import Fernet, InvalidToken
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 
 
 # --- Key loading -------------------------------------------------------------
+#
+# Rotation: put the new key in DATA_ENC_KEY / HMAC_KEY and move the previous
+# ones to DATA_ENC_OLD_KEYS / HMAC_OLD_KEYS (comma-separated). Old keys are
+# only used to read; run `flask rotate_keys` to rewrite every row with the new
+# keys, then drop the old ones.
 
-def _load_data_key() -> bytes:
-    """
-    Load the symmetric key for field encryption (Fernet).
-    Expect DATA_ENC_KEY as a urlsafe base64 32-byte key.
-    Generate one with:
-      python -c "from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())"
-    """
-    key = os.environ.get("DATA_ENC_KEY")
-    if not key:
-        raise RuntimeError("DATA_ENC_KEY not set")
+def _split_keys(name: str) -> list[str]:
+    return [k.strip() for k in os.environ.get(name, "").split(",") if k.strip()]
+
+
+def _check_fernet_key(name: str, key: str) -> bytes:
     try:
         raw = base64.urlsafe_b64decode(key)
     except Exception as e:
-        raise RuntimeError("DATA_ENC_KEY must be urlsafe base64 (Fernet key)") from e
+        raise RuntimeError(f"{name} must be urlsafe base64 (Fernet key)") from e
     if len(raw) != 32:
-        raise RuntimeError("DATA_ENC_KEY must decode to 32 bytes")
+        raise RuntimeError(f"{name} must decode to 32 bytes")
     return key.encode("utf-8")  # Fernet expects the base64 text
 
 
-def _load_hmac_key() -> bytes:
+def _load_data_keys() -> list[bytes]:
     """
-    Load the secret for deterministic HMAC indexing (e.g., username/email).
-    HMAC_KEY can be any bytes; we accept either raw text or hex.
+    Load the symmetric keys for field encryption (Fernet), current key first.
+    Expect DATA_ENC_KEY (and optional DATA_ENC_OLD_KEYS) as urlsafe base64 32-byte keys.
+    Generate one with:
+      python -c "from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())"
     """
-    key = os.environ.get("HMAC_KEY")
+    key = os.environ.get("DATA_ENC_KEY")
     if not key:
-        raise RuntimeError("HMAC_KEY not set")
+        raise RuntimeError("DATA_ENC_KEY not set")
+    keys = [_check_fernet_key("DATA_ENC_KEY", key)]
+    keys += [_check_fernet_key("DATA_ENC_OLD_KEYS", k) for k in _split_keys("DATA_ENC_OLD_KEYS")]
+    return keys
+
+
+def _parse_hmac_key(key: str) -> bytes:
     # Allow hex-encoded or plain string
     try:
         return bytes.fromhex(key)
@@ -43,23 +51,66 @@ def _load_hmac_key() -> bytes:
         return key.encode("utf-8")
 
 
+def _load_hmac_keys() -> list[bytes]:
+    """
+    Load the secrets for deterministic HMAC indexing (e.g., username/email), current key first.
+    HMAC_KEY / HMAC_OLD_KEYS can be any bytes; we accept either raw text or hex.
+    """
+    key = os.environ.get("HMAC_KEY")
+    if not key:
+        raise RuntimeError("HMAC_KEY not set")
+    return [_parse_hmac_key(key)] + [_parse_hmac_key(k) for k in _split_keys("HMAC_OLD_KEYS")]
+
+
 # Singletons
-_FERNET: Fernet | None = None
-_HMAC_KEY: bytes | None = None
+_DATA_KEYS: list[bytes] | None = None
+_FERNET: MultiFernet | None = None
+_PRIMARY_FERNET: Fernet | None = None
+_HMAC_KEYS: list[bytes] | None = None
+_SEARCH_KEY: bytes | None = None
+
+
+def _data_keys() -> list[bytes]:
+    global _DATA_KEYS
+    if _DATA_KEYS is None:
+        _DATA_KEYS = _load_data_keys()
+    return _DATA_KEYS
 
 
-def _fernet() -> Fernet:
-    global _FERNET
+def _fernet() -> MultiFernet:
+    """Encrypts with the current key, decrypts with any configured key."""
+    global _FERNET, _PRIMARY_FERNET
     if _FERNET is None:
-        _FERNET = Fernet(_load_data_key())
+        fernets = [Fernet(k) for k in _data_keys()]
+        _PRIMARY_FERNET = fernets[0]
+        _FERNET = MultiFernet(fernets)
     return _FERNET
 
 
+def _primary_fernet() -> Fernet:
+    _fernet()
+    return _PRIMARY_FERNET  # type: ignore[return-value]
+
+
+def _hmac_keys() -> list[bytes]:
+    global _HMAC_KEYS
+    if _HMAC_KEYS is None:
+        _HMAC_KEYS = _load_hmac_keys()
+    return _HMAC_KEYS
+
+
 def _hmac_key() -> bytes:
-    global _HMAC_KEY
-    if _HMAC_KEY is None:
-        _HMAC_KEY = _load_hmac_key()
-    return _HMAC_KEY
+    return _hmac_keys()[0]
+
+
+def has_old_keys() -> bool:
+    """True while a rotation is pending (old data or HMAC keys configured)."""
+    return len(_data_keys()) > 1 or len(_hmac_keys()) > 1
+
+
+def key_fingerprint() -> str:
+    """Short non-reversible id of the current key pair (for rotation checkpoints)."""
+    return sha256(_data_keys()[0] + b"|" + _hmac_key()).hexdigest()[:16]
 
 
 # --- Public helpers used by your models / init -------------------------------
@@ -90,6 +141,27 @@ def decrypt_field(value: Union[bytes, memoryview, None]) -> str | None:
     return plain.decode("utf-8")
 
 
+def is_current_token(value: Union[bytes, memoryview, None]) -> bool:
+    """
+    True if the ciphertext was written with the current DATA_ENC_KEY
+    (i.e. key rotation can skip it).
+    """
+    if value is None:
+        return True
+    if isinstance(value, memoryview):
+        value = value.tobytes()
+    try:
+        _primary_fernet().decrypt(value)
+    except InvalidToken:
+        return False
+    return True
+
+
+def _hmac_digest(key: bytes, value: str) -> str:
+    msg = value.strip().lower().encode("utf-8")
+    return hmac.new(key, msg, sha256).hexdigest()
+
+
 def hmac_index(value: str) -> str:
     """
     Deterministically derive a constant-time, non-reversible index for lookups.
@@ -98,6 +170,31 @@ def hmac_index(value: str) -> str:
     """
     if value is None:
         return None  # type: ignore[return-value]
-    msg = value.strip().lower().encode("utf-8")
-    digest = hmac.new(_hmac_key(), msg, sha256).hexdigest()
-    return digest
+    return _hmac_digest(_hmac_key(), value)
+
+
+def hmac_candidates(value: str) -> list[str]:
+    """
+    hmac_index() under every configured HMAC key, current first. Use for
+    lookups so rows not yet rotated are still found:
+      User.username_hmac.in_(hmac_candidates(name))
+    """
+    if value is None:
+        return []
+    return [_hmac_digest(k, value) for k in _hmac_keys()]
+
+
+def _search_key() -> bytes:
+    # Derived from the current HMAC key, domain-separated from hmac_index()
+    global _SEARCH_KEY
+    if _SEARCH_KEY is None:
+        _SEARCH_KEY = hmac.new(_hmac_key(), b"user-search-v1", sha256).digest()
+    return _SEARCH_KEY
+
+
+def blind_token(value: str) -> str:
+    """
+    Keyed token for the blind search index (see app/user_search.py).
+    Truncated to 128 bits (32 hex chars); callers normalize the input.
+    """
+    return hmac.new(_search_key(), value.encode("utf-8"), sha256).hexdigest()[:32]
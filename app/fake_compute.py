@@ -0,0 +1,315 @@
+# app/fake_compute.py
+"""
+In-process stand-in for the slice of azure.mgmt.compute we use:
+
+    virtual_machines.begin_start / begin_deallocate / begin_create_or_update / get
+    disks.get
+
+Enable with AZURE_COMPUTE_FAKE=1 (vm_management._compute() then returns the
+process-wide instance). Behaviour is tuned via env or constructor kwargs:
+
+    AZURE_FAKE_LATENCY_MS      round-trip for every ARM request (default 50)
+    AZURE_FAKE_LRO_MS          how long begin_* operations run (default 500)
+    AZURE_FAKE_POLL_MS         poller sleep between status checks (default 100)
+    AZURE_FAKE_FAILURE_RATE    probability an LRO ends in Failed (default 0)
+    AZURE_FAKE_ERROR_RATE      probability a request is rejected with 500 (default 0)
+    AZURE_FAKE_MAX_CONCURRENT  in-flight LROs per subscription before 429 (default 0 = unlimited)
+    AZURE_FAKE_SEED            RNG seed for reproducible failure injection
+
+Like ARM, a VM accepts one operation at a time (409 Conflict otherwise) and
+an OS-disk swap is only allowed while the VM is deallocated.
+"""
+from __future__ import annotations
+import copy
+import os
+import random
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
+
+SUBSCRIPTION_ID = "00000000-0000-0000-0000-000000000000"
+
+
+def _error(cls, status: int, code: str, message: str):
+    e = cls(message=f"({code}) {message}")
+    e.status_code = status
+    e.error_code = code
+    return e
+
+
+def _headers():
+    return {"x-ms-request-id": str(uuid.uuid4())}
+
+
+class _Operation:
+    """A long-running operation in flight against one VM."""
+
+    def __init__(self, kind: str, vm_name: str, duration: float, fail: bool, apply):
+        self.kind = kind
+        self.vm_name = vm_name
+        self.deadline = time.monotonic() + duration
+        self.fail = fail
+        self.apply = apply          # called once on success, under the client lock
+        self.status = "InProgress"  # -> Succeeded / Failed
+
+
+class FakePoller:
+    """Mimics azure.core.polling.LROPoller closely enough for vm_management."""
+
+    def __init__(self, client: "FakeComputeClient", op: _Operation, result=None):
+        self._client = client
+        self._op = op
+        self._result = result
+        # vm_management._hdr_request_ids() digs the request id out of here
+        response = SimpleNamespace(http_response=SimpleNamespace(headers=_headers()))
+        self._polling_method = SimpleNamespace(_initial_response=response)
+
+    def status(self) -> str:
+        self._client._settle(self._op.vm_name)
+        return self._op.status
+
+    def done(self) -> bool:
+        return self.status() != "InProgress"
+
+    def wait(self, timeout: float | None = None):
+        limit = None if timeout is None else time.monotonic() + timeout
+        while not self.done():
+            if limit is not None and time.monotonic() >= limit:
+                return
+            self._client._poll_sleep()
+
+    def result(self, timeout: float | None = None):
+        self.wait(timeout)
+        if self._op.status == "Failed":
+            raise _error(HttpResponseError, 500, "OperationFailed",
+                         f"{self._op.kind} on '{self._op.vm_name}' failed (injected)")
+        if self._op.status == "InProgress":
+            return None
+        return copy.deepcopy(self._result() if callable(self._result) else self._result)
+
+
+class _VirtualMachines:
+    def __init__(self, client: "FakeComputeClient"):
+        self._c = client
+
+    def get(self, resource_group_name: str, vm_name: str, **kwargs):
+        c = self._c
+        c._request("virtual_machines.get")
+        with c._lock:
+            c._settle_locked(vm_name)
+            return copy.deepcopy(c._vm(resource_group_name, vm_name).model)
+
+    def begin_start(self, resource_group_name: str, vm_name: str, **kwargs):
+        def apply(vm):
+            vm.power_state = "running"
+        return self._c._begin("start", resource_group_name, vm_name, apply)
+
+    def begin_deallocate(self, resource_group_name: str, vm_name: str, **kwargs):
+        def apply(vm):
+            vm.power_state = "deallocated"
+        return self._c._begin("deallocate", resource_group_name, vm_name, apply)
+
+    def begin_create_or_update(self, resource_group_name: str, vm_name: str, parameters, **kwargs):
+        c = self._c
+        new_disk_id = parameters.storage_profile.os_disk.managed_disk.id
+
+        def check(vm):
+            current = vm.model.storage_profile.os_disk.managed_disk.id
+            if new_disk_id != current and vm.power_state != "deallocated":
+                raise _error(HttpResponseError, 409, "OperationNotAllowed",
+                             "Changing the OS disk requires the VM to be deallocated.")
+            if not c._disk_exists(new_disk_id):
+                raise _error(ResourceNotFoundError, 404, "NotFound", f"Disk '{new_disk_id}' not found.")
+
+        def apply(vm):
+            vm.model.storage_profile.os_disk.managed_disk.id = new_disk_id
+            vm.model.storage_profile.os_disk.name = new_disk_id.rsplit("/", 1)[-1]
+
+        return c._begin("create_or_update", resource_group_name, vm_name, apply, check=check)
+
+
+class _Disks:
+    def __init__(self, client: "FakeComputeClient"):
+        self._c = client
+
+    def get(self, resource_group_name: str, disk_name: str, **kwargs):
+        c = self._c
+        c._request("disks.get")
+        with c._lock:
+            return copy.deepcopy(c._disk(resource_group_name, disk_name))
+
+
+class _VM:
+    def __init__(self, model, power_state: str):
+        self.model = model
+        self.power_state = power_state
+        self.op: _Operation | None = None
+
+
+class FakeComputeClient:
+    """Thread-safe fake ComputeManagementClient. See module docstring."""
+
+    def __init__(self, latency_ms: float = 50, lro_ms: float = 500, poll_ms: float = 100,
+                 failure_rate: float = 0.0, error_rate: float = 0.0, max_concurrent: int = 0,
+                 auto_create: bool = True, seed: int | None = None):
+        self.latency = latency_ms / 1000
+        self.lro = lro_ms / 1000
+        self.poll = poll_ms / 1000
+        self.failure_rate = failure_rate
+        self.error_rate = error_rate
+        self.max_concurrent = max_concurrent
+        self.auto_create = auto_create
+        self._rng = random.Random(seed)
+        self._lock = threading.RLock()
+        self._vms: dict[str, _VM] = {}
+        self._disks: dict[str, SimpleNamespace] = {}
+        self.virtual_machines = _VirtualMachines(self)
+        self.disks = _Disks(self)
+        self.reset_stats()
+
+    @classmethod
+    def from_env(cls) -> "FakeComputeClient":
+        seed = os.getenv("AZURE_FAKE_SEED")
+        return cls(
+            latency_ms=float(os.getenv("AZURE_FAKE_LATENCY_MS", "50")),
+            lro_ms=float(os.getenv("AZURE_FAKE_LRO_MS", "500")),
+            poll_ms=float(os.getenv("AZURE_FAKE_POLL_MS", "100")),
+            failure_rate=float(os.getenv("AZURE_FAKE_FAILURE_RATE", "0")),
+            error_rate=float(os.getenv("AZURE_FAKE_ERROR_RATE", "0")),
+            max_concurrent=int(os.getenv("AZURE_FAKE_MAX_CONCURRENT", "0")),
+            seed=int(seed) if seed else None,
+        )
+
+    # --- Seeding / inspection ----------------------------------------------
+
+    def add_disk(self, resource_group: str, disk_name: str):
+        disk_id = (f"/subscriptions/{SUBSCRIPTION_ID}/resourceGroups/{resource_group}"
+                   f"/providers/Microsoft.Compute/disks/{disk_name}")
+        disk = SimpleNamespace(id=disk_id, name=disk_name, disk_state="Unattached")
+        with self._lock:
+            self._disks[disk_name.lower()] = disk
+        return disk
+
+    def add_vm(self, resource_group: str, vm_name: str, os_disk_name: str | None = None,
+               power_state: str = "running"):
+        disk = self.add_disk(resource_group, os_disk_name or f"{vm_name}-osdisk")
+        model = SimpleNamespace(
+            id=(f"/subscriptions/{SUBSCRIPTION_ID}/resourceGroups/{resource_group}"
+                f"/providers/Microsoft.Compute/virtualMachines/{vm_name}"),
+            name=vm_name,
+            storage_profile=SimpleNamespace(
+                os_disk=SimpleNamespace(name=disk.name, managed_disk=SimpleNamespace(id=disk.id)),
+            ),
+        )
+        with self._lock:
+            self._vms[vm_name.lower()] = _VM(model, power_state)
+        return model
+
+    def power_state(self, vm_name: str) -> str:
+        with self._lock:
+            self._settle_locked(vm_name)
+            return self._vms[vm_name.lower()].power_state
+
+    def reset_stats(self):
+        self.stats = {"requests": 0, "polls": 0, "lros": 0, "failed": 0, "errors": 0,
+                      "conflicts": 0, "throttled": 0, "in_flight": 0, "peak_in_flight": 0}
+
+    # --- Internals ----------------------------------------------------------
+
+    def _vm(self, resource_group: str, vm_name: str) -> _VM:
+        vm = self._vms.get(vm_name.lower())
+        if vm is None:
+            if not self.auto_create:
+                raise _error(ResourceNotFoundError, 404, "ResourceNotFound", f"VM '{vm_name}' not found.")
+            self.add_vm(resource_group, vm_name)
+            vm = self._vms[vm_name.lower()]
+        return vm
+
+    def _disk(self, resource_group: str, disk_name: str):
+        disk = self._disks.get(disk_name.lower())
+        if disk is None:
+            if not self.auto_create:
+                raise _error(ResourceNotFoundError, 404, "ResourceNotFound", f"Disk '{disk_name}' not found.")
+            disk = self.add_disk(resource_group, disk_name)
+        return disk
+
+    def _disk_exists(self, disk_id: str) -> bool:
+        return any(d.id == disk_id for d in self._disks.values())
+
+    def _request(self, name: str):
+        """One ARM round-trip: latency + optional injected 5xx."""
+        time.sleep(self.latency)
+        with self._lock:
+            self.stats["requests"] += 1
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self.stats["errors"] += 1
+                raise _error(HttpResponseError, 500, "InternalServerError", f"{name}: injected error")
+
+    def _poll_sleep(self):
+        with self._lock:
+            self.stats["polls"] += 1
+        time.sleep(self.poll)
+
+    def _settle(self, vm_name: str):
+        with self._lock:
+            self._settle_locked(vm_name)
+
+    def _settle_locked(self, vm_name: str):
+        vm = self._vms.get(vm_name.lower())
+        op = vm and vm.op
+        if not op or time.monotonic() < op.deadline:
+            return
+        if op.fail:
+            op.status = "Failed"
+            self.stats["failed"] += 1
+        else:
+            op.apply(vm)
+            op.status = "Succeeded"
+        vm.op = None
+        self.stats["in_flight"] -= 1
+
+    def _begin(self, kind: str, resource_group: str, vm_name: str, apply, check=None) -> FakePoller:
+        self._request(f"virtual_machines.begin_{kind}")
+        with self._lock:
+            vm = self._vm(resource_group, vm_name)
+            self._settle_locked(vm_name)
+            if vm.op is not None:
+                self.stats["conflicts"] += 1
+                raise _error(HttpResponseError, 409, "Conflict",
+                             f"Operation '{vm.op.kind}' is already in progress on VM '{vm_name}'.")
+            if self.max_concurrent and self.stats["in_flight"] >= self.max_concurrent:
+                self.stats["throttled"] += 1
+                raise _error(HttpResponseError, 429, "TooManyRequests", "Subscription operation limit reached.")
+            if check:
+                check(vm)
+            fail = bool(self.failure_rate) and self._rng.random() < self.failure_rate
+            op = _Operation(kind, vm_name, self.lro, fail, apply)
+            vm.op = op
+            self.stats["lros"] += 1
+            self.stats["in_flight"] += 1
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.stats["in_flight"])
+        result = (lambda: vm.model) if kind == "create_or_update" else None
+        return FakePoller(self, op, result)
+
+
+# Process-wide instance so every _compute() call sees the same VMs/disks
+_FAKE: FakeComputeClient | None = None
+_FAKE_LOCK = threading.Lock()
+
+
+def get_fake_compute() -> FakeComputeClient:
+    global _FAKE
+    with _FAKE_LOCK:
+        if _FAKE is None:
+            _FAKE = FakeComputeClient.from_env()
+        return _FAKE
+
+
+def set_fake_compute(client: FakeComputeClient | None):
+    """Swap the process-wide instance (benchmarks use this to change settings)."""
+    global _FAKE
+    with _FAKE_LOCK:
+        _FAKE = client
@@ -0,0 +1,115 @@
+# app/key_rotation.py
+"""
+Online re-encryption of User.username_enc/email_enc and recomputation of
+username_hmac/email_hmac after a DATA_ENC_KEY / HMAC_KEY rotation.
+
+Reads use MultiFernet + hmac_candidates(), so the app keeps working while this
+runs. Users are read in primary-key order, one keyset-paginated chunk at a
+time (utils.keyset_chunks); each chunk is bulk-updated and committed on its
+own, and a checkpoint is written to job_log (action="key_rotation") after
+every chunk, so an interrupted run resumes where it stopped. Rows already on
+the current keys are skipped.
+
+    flask --app app.main rotate_keys --chunk-size 500 --max-rows-per-sec 2000
+"""
+from __future__ import annotations
+import logging
+import time
+
+from flask import current_app
+from sqlalchemy import func, update
+
+from .crypto import decrypt_field, encrypt_field, hmac_index, is_current_token, key_fingerprint
+from .models import db, User, JobLog
+from .user_search import replace_tokens
+from .utils import keyset_chunks
+
+log = logging.getLogger(__name__)
+
+ACTION = "key_rotation"
+
+
+def _last_checkpoint(fingerprint: str) -> int:
+    """last_id of an unfinished run for the same target keys, else 0."""
+    row = (JobLog.query.filter_by(action=ACTION)
+           .order_by(JobLog.id.desc())
+           .first())
+    ctx = (row.context or {}) if row else {}
+    if ctx.get("fingerprint") != fingerprint or ctx.get("finished"):
+        return 0
+    return int(ctx.get("last_id") or 0)
+
+
+def _rotate_row(row) -> tuple[dict, tuple] | None:
+    """
+    (new column values, (id, username, email)) for one user, or None if it is
+    already current. The plaintext tuple is used to rebuild search tokens.
+    """
+    username = decrypt_field(row.username_enc)
+    email = decrypt_field(row.email_enc)
+    username_hmac, email_hmac = hmac_index(username), hmac_index(email)
+    if (is_current_token(row.username_enc) and is_current_token(row.email_enc)
+            and row.username_hmac == username_hmac and row.email_hmac == email_hmac):
+        return None
+    values = {
+        "id": row.id,
+        "username_enc": encrypt_field(username),
+        "email_enc": encrypt_field(email),
+        "username_hmac": username_hmac,
+        "email_hmac": email_hmac,
+    }
+    return values, (row.id, username, email)
+
+
+def rotate_user_keys(chunk_size: int = 500, pause: float = 0.0, max_rows_per_sec: float | None = None,
+                     restart: bool = False, progress=None) -> dict:
+    """
+    Re-encrypt / re-index every user with the current keys (inside an app context).
+
+    pause             seconds to sleep after each chunk
+    max_rows_per_sec  additional throttle on scanned rows (None = unlimited)
+    restart           ignore any checkpoint and start from the first user
+    progress          optional callable(stats_dict) called after each chunk
+    """
+    fingerprint = key_fingerprint()
+    last_id = 0 if restart else _last_checkpoint(fingerprint)
+    total = db.session.query(func.count(User.id)).filter(User.id > last_id).scalar() or 0
+    stats = {"scanned": 0, "updated": 0, "remaining": total, "last_id": last_id,
+             "resumed_from": last_id, "elapsed_s": 0.0}
+    started = time.perf_counter()
+    log.info("Key rotation starting after user id %s (%s users to scan)", last_id, total)
+
+    cols = (User.id, User.username_enc, User.email_enc, User.username_hmac, User.email_hmac)
+    chunk_started = time.perf_counter()
+    for rows in keyset_chunks(cols, User.id, chunk_size, after=last_id):
+        changes = [c for c in (_rotate_row(r) for r in rows) if c]
+        if changes:
+            db.session.execute(update(User), [values for values, _ in changes])  # executemany UPDATE ... WHERE id = :id
+            # Bulk UPDATE skips the ORM flush hook; search tokens follow the HMAC key
+            replace_tokens(db.session, [plain for _, plain in changes])
+        last_id = rows[-1].id
+
+        stats["scanned"] += len(rows)
+        stats["updated"] += len(changes)
+        stats["remaining"] = max(0, total - stats["scanned"])
+        stats["last_id"] = last_id
+        stats["elapsed_s"] = round(time.perf_counter() - started, 2)
+        db.session.add(JobLog(level="INFO", action=ACTION,
+                              message=f"Rotated {stats['updated']}/{stats['scanned']} users (last id {last_id})",
+                              context={"fingerprint": fingerprint, **stats}))
+        db.session.commit()  # chunk + checkpoint together
+        if progress:
+            progress(dict(stats))
+
+        delay = pause
+        if max_rows_per_sec:
+            delay = max(delay, len(rows) / max_rows_per_sec - (time.perf_counter() - chunk_started))
+        if delay > 0:
+            time.sleep(delay)
+        chunk_started = time.perf_counter()
+
+    stats["elapsed_s"] = round(time.perf_counter() - started, 2)
+    current_app.log_db("INFO", ACTION, f"Key rotation finished: {stats['updated']} of {stats['scanned']} users updated",
+                       fingerprint=fingerprint, finished=True, **stats)
+    log.info("Key rotation finished: %s", stats)
+    return stats
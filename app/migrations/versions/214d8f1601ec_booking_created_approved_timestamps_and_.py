@@ -0,0 +1,55 @@
+"""booking created/approved timestamps and daily stats rollup
+
+Existing bookings keep created_at/approved_at NULL (their real times are
+unknown, and backfilling "now" would pile them all onto the upgrade day);
+the column default only applies to new rows. Run `flask analytics_rebuild`
+once after upgrading to fill booking_daily_stats.
+
+Revision ID: 214d8f1601ec
+Revises: 2694b249d560
+Create Date: 2026-10-19 16:29:52.586434
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '214d8f1601ec'
+down_revision = '2694b249d560'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('booking') as batch_op:
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(timezone=True), nullable=True))
+        batch_op.add_column(sa.Column('approved_at', sa.DateTime(timezone=True), nullable=True))
+    # Default added separately so existing rows are left NULL
+    with op.batch_alter_table('booking') as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(timezone=True),
+                              server_default=sa.func.now())
+
+    op.create_table(
+        'booking_daily_stats',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('requested', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('approved', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('rejected', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('failed', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('booked', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('booked_hours', sa.Float(), server_default='0', nullable=False),
+        sa.Column('approval_latency_sum_s', sa.Float(), server_default='0', nullable=False),
+        sa.Column('approval_latency_max_s', sa.Float(), server_default='0', nullable=False),
+        sa.Column('start_delay_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('start_delay_sum_s', sa.Float(), server_default='0', nullable=False),
+        sa.Column('start_delay_max_s', sa.Float(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('day'),
+    )
+
+
+def downgrade():
+    op.drop_table('booking_daily_stats')
+    with op.batch_alter_table('booking') as batch_op:
+        batch_op.drop_column('approved_at')
+        batch_op.drop_column('created_at')
@@ -0,0 +1,35 @@
+"""user search token table
+
+Blind-index tokens for admin user search (app/user_search.py). The table
+starts empty: run `flask search_backfill` once after upgrading.
+
+Revision ID: 2694b249d560
+Revises: 8a76672a4e53
+Create Date: 2026-10-19 16:29:51.548657
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2694b249d560'
+down_revision = '8a76672a4e53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'user_search_token',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('token', sa.String(length=32), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'token'),
+    )
+    op.create_index('ix_user_search_token_token_user', 'user_search_token', ['token', 'user_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_user_search_token_token_user', table_name='user_search_token')
+    op.drop_table('user_search_token')
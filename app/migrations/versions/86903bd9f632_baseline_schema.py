@@ -0,0 +1,78 @@
+"""baseline schema
+
+The tables as the first release created them with db.create_all(). Databases
+from that era have no alembic_version table; db_init stamps them at this
+revision before upgrading.
+
+Revision ID: 86903bd9f632
+Revises:
+Create Date: 2026-10-19 16:29:01.757148
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '86903bd9f632'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'user',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username_enc', sa.LargeBinary(), nullable=False),
+        sa.Column('email_enc', sa.LargeBinary(), nullable=False),
+        sa.Column('username_hmac', sa.String(length=64), nullable=False),
+        sa.Column('email_hmac', sa.String(length=64), nullable=False),
+        sa.Column('password_hash', sa.String(length=255), nullable=False),
+        sa.Column('role', sa.String(length=20), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_user_username_hmac', 'user', ['username_hmac'], unique=True)
+    op.create_index('ix_user_email_hmac', 'user', ['email_hmac'], unique=True)
+
+    op.create_table(
+        'booking',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_hmac', sa.String(length=64), nullable=False),
+        sa.Column('start_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('end_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('approved', sa.Boolean(), nullable=False),
+        sa.Column('vm_name', sa.String(length=128), nullable=True),
+        sa.Column('disk_name', sa.String(length=128), nullable=True),
+        sa.Column('last_run_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_status', sa.String(length=32), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_booking_user_hmac', 'booking', ['user_hmac'], unique=False)
+
+    op.create_table(
+        'job_log',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(),
+                  nullable=False),
+        sa.Column('level', sa.String(length=16), nullable=False),
+        sa.Column('action', sa.String(length=64), nullable=False),
+        sa.Column('booking_id', sa.Integer(), nullable=True),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('context', sa.JSON().with_variant(postgresql.JSONB(), 'postgresql'), nullable=True),
+        sa.ForeignKeyConstraint(['booking_id'], ['booking.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_job_log_booking_id', 'job_log', ['booking_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_job_log_booking_id', table_name='job_log')
+    op.drop_table('job_log')
+    op.drop_index('ix_booking_user_hmac', table_name='booking')
+    op.drop_table('booking')
+    op.drop_index('ix_user_email_hmac', table_name='user')
+    op.drop_index('ix_user_username_hmac', table_name='user')
+    op.drop_table('user')
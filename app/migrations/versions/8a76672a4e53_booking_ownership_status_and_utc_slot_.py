@@ -0,0 +1,83 @@
+"""booking ownership, status and UTC slot columns
+
+Adds user_id/status/start_at_utc/end_at_utc/started_at_utc, copies legacy rows
+into them (owner via user_hmac, status from the approved flag) and relaxes
+NOT NULL on the legacy user_hmac/start_at/end_at, which new rows leave empty.
+
+Revision ID: 8a76672a4e53
+Revises: 86903bd9f632
+Create Date: 2026-10-19 16:29:03.013295
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a76672a4e53'
+down_revision = '86903bd9f632'
+branch_labels = None
+depends_on = None
+
+user = sa.table('user', sa.column('id', sa.Integer), sa.column('username_hmac', sa.String))
+booking = sa.table(
+    'booking',
+    sa.column('user_id', sa.Integer), sa.column('user_hmac', sa.String),
+    sa.column('start_at', sa.DateTime(timezone=True)), sa.column('end_at', sa.DateTime(timezone=True)),
+    sa.column('start_at_utc', sa.DateTime(timezone=True)), sa.column('end_at_utc', sa.DateTime(timezone=True)),
+    sa.column('approved', sa.Boolean), sa.column('status', sa.String),
+)
+
+
+def upgrade():
+    with op.batch_alter_table('booking') as batch_op:
+        batch_op.add_column(sa.Column('user_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('start_at_utc', sa.DateTime(timezone=True), nullable=True))
+        batch_op.add_column(sa.Column('end_at_utc', sa.DateTime(timezone=True), nullable=True))
+        batch_op.add_column(sa.Column('status', sa.String(length=32), nullable=False, server_default='pending'))
+        batch_op.add_column(sa.Column('started_at_utc', sa.DateTime(timezone=True), nullable=True))
+        batch_op.alter_column('user_hmac', existing_type=sa.String(length=64), nullable=True)
+        batch_op.alter_column('start_at', existing_type=sa.DateTime(timezone=True), nullable=True)
+        batch_op.alter_column('end_at', existing_type=sa.DateTime(timezone=True), nullable=True)
+        batch_op.create_foreign_key('fk_booking_user_id_user', 'user', ['user_id'], ['id'])
+        batch_op.create_index('ix_booking_user_id', ['user_id'], unique=False)
+        batch_op.create_index('ix_booking_start_at_utc', ['start_at_utc'], unique=False)
+        batch_op.create_index('ix_booking_status', ['status'], unique=False)
+
+    owner = (sa.select(user.c.id).where(user.c.username_hmac == booking.c.user_hmac)
+             .scalar_subquery())
+    op.execute(
+        booking.update()
+        .where(booking.c.start_at_utc.is_(None))
+        .values(
+            user_id=owner,
+            start_at_utc=booking.c.start_at,
+            end_at_utc=booking.c.end_at,
+            status=sa.case((booking.c.approved == sa.true(), 'approved'), else_='pending'),
+        )
+    )
+
+
+def downgrade():
+    # Rows created after the upgrade have no legacy values; fill them back in
+    # before NOT NULL is restored.
+    owner_hmac = (sa.select(user.c.username_hmac).where(user.c.id == booking.c.user_id)
+                  .scalar_subquery())
+    op.execute(
+        booking.update()
+        .where(booking.c.start_at.is_(None))
+        .values(user_hmac=owner_hmac, start_at=booking.c.start_at_utc, end_at=booking.c.end_at_utc)
+    )
+    with op.batch_alter_table('booking') as batch_op:
+        batch_op.drop_index('ix_booking_status')
+        batch_op.drop_index('ix_booking_start_at_utc')
+        batch_op.drop_index('ix_booking_user_id')
+        batch_op.drop_constraint('fk_booking_user_id_user', type_='foreignkey')
+        batch_op.alter_column('end_at', existing_type=sa.DateTime(timezone=True), nullable=False)
+        batch_op.alter_column('start_at', existing_type=sa.DateTime(timezone=True), nullable=False)
+        batch_op.alter_column('user_hmac', existing_type=sa.String(length=64), nullable=False)
+        batch_op.drop_column('started_at_utc')
+        batch_op.drop_column('status')
+        batch_op.drop_column('end_at_utc')
+        batch_op.drop_column('start_at_utc')
+        batch_op.drop_column('user_id')
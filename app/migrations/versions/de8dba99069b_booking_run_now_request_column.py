@@ -0,0 +1,29 @@
+"""booking run-now request column
+
+Set by the admin "Run now" action in web-only processes (APP_MODE=web);
+the worker's sync job claims it and runs the booking.
+
+Revision ID: de8dba99069b
+Revises: 214d8f1601ec
+Create Date: 2026-10-19 16:31:16.330396
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'de8dba99069b'
+down_revision = '214d8f1601ec'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('booking') as batch_op:
+        batch_op.add_column(sa.Column('run_requested_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('booking') as batch_op:
+        batch_op.drop_column('run_requested_at')
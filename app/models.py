@@ -1,14 +1,20 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from flask_login import UserMixin
 from sqlalchemy import func
 from sqlalchemy.dialects.postgresql import JSONB
 
+from .crypto import decrypt_field
+
 db = SQLAlchemy()
 migrate = Migrate()
 
+# JSONB on Postgres, plain JSON elsewhere (SQLite for local runs / benchmarks)
+PortableJSON = db.JSON().with_variant(JSONB(), "postgresql")
+
 
-class User(db.Model):
+class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username_enc = db.Column(db.LargeBinary, nullable=False)
     email_enc = db.Column(db.LargeBinary, nullable=False)
@@ -17,12 +23,48 @@ class User(db.Model):
     password_hash = db.Column(db.String(255), nullable=False)
     role = db.Column(db.String(20), nullable=False, default="user")
 
+    @property
+    def username(self) -> str | None:
+        return decrypt_field(self.username_enc)
+
+    @property
+    def email(self) -> str | None:
+        return decrypt_field(self.email_enc)
+
+    def is_admin(self) -> bool:
+        return self.role == "admin"
+
+
+class UserSearchToken(db.Model):
+    """Blind-index n-gram/prefix tokens for admin user search (app/user_search.py)."""
+    __tablename__ = "user_search_token"
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    token = db.Column(db.String(32), primary_key=True)
+
+    __table_args__ = (db.Index("ix_user_search_token_token_user", "token", "user_id"),)
+
+
+# Statuses that hold the VM slot ("starting" = claimed by a start job, orchestration in progress)
+ACTIVE_STATUSES = ("approved", "starting", "running")
+
 
 class Booking(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_hmac = db.Column(db.String(64), nullable=False, index=True)
-    start_at = db.Column(db.DateTime(timezone=True), nullable=False)
-    end_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True, index=True)
+    start_at_utc = db.Column(db.DateTime(timezone=True), nullable=True, index=True)
+    end_at_utc = db.Column(db.DateTime(timezone=True), nullable=True)
+    status = db.Column(db.String(32), nullable=False, default="pending", server_default="pending", index=True)  # pending/approved/rejected/starting/running/failed
+    started_at_utc = db.Column(db.DateTime(timezone=True))
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc),
+                           server_default=func.now())
+    approved_at = db.Column(db.DateTime(timezone=True))
+    run_requested_at = db.Column(db.DateTime(timezone=True))  # admin "Run now" awaiting the worker
+
+    # Legacy columns from the first schema; migration 8a76672a4e53 copies them
+    # into the columns above and makes them nullable
+    user_hmac = db.Column(db.String(64), nullable=True, index=True)
+    start_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    end_at = db.Column(db.DateTime(timezone=True), nullable=True)
     approved = db.Column(db.Boolean, default=False, nullable=False)
     vm_name = db.Column(db.String(128), nullable=True)
     disk_name = db.Column(db.String(128), nullable=True)
@@ -32,6 +74,30 @@ class Booking(db.Model):
     last_status = db.Column(db.String(32))
     last_error = db.Column(db.Text)
 
+    user = db.relationship("User", backref="bookings")
+
+
+class BookingDailyStats(db.Model):
+    """
+    Per-UTC-day booking rollup, maintained incrementally by app/analytics.py.
+    Counts are keyed by the day the event happened: requested -> created_at,
+    approved/latency -> approved_at, everything else -> the slot's start day
+    (booked_hours is split across days for slots crossing midnight).
+    """
+    __tablename__ = "booking_daily_stats"
+    day = db.Column(db.Date, primary_key=True)
+    requested = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    approved = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rejected = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    failed = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    booked = db.Column(db.Integer, nullable=False, default=0, server_default="0")  # approved/running slots
+    booked_hours = db.Column(db.Float, nullable=False, default=0.0, server_default="0")
+    approval_latency_sum_s = db.Column(db.Float, nullable=False, default=0.0, server_default="0")
+    approval_latency_max_s = db.Column(db.Float, nullable=False, default=0.0, server_default="0")
+    start_delay_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    start_delay_sum_s = db.Column(db.Float, nullable=False, default=0.0, server_default="0")
+    start_delay_max_s = db.Column(db.Float, nullable=False, default=0.0, server_default="0")
+
 
 class JobLog(db.Model):
     __tablename__ = "job_log"
@@ -41,6 +107,6 @@ class JobLog(db.Model):
     action = db.Column(db.String(64), nullable=False)  # run_booking/start_vm/swap_os_disk/...
     booking_id = db.Column(db.Integer, db.ForeignKey("booking.id"), nullable=True, index=True)
     message = db.Column(db.Text, nullable=False)
-    context = db.Column(JSONB, nullable=True)
+    context = db.Column(PortableJSON, nullable=True)
 
     booking = db.relationship("Booking", backref="logs")
@@ -1,12 +1,20 @@
 # app/scheduler.py
 from __future__ import annotations
 import logging
-from datetime import datetime, timezone
-from apscheduler.schedulers.background import BackgroundScheduler
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
+
+from .sqlprof import profile
+
+if TYPE_CHECKING:  # apscheduler is imported lazily so web-only processes never load it
+    from apscheduler.schedulers.background import BackgroundScheduler
 
 # Global refs so jobs can enter an app context
 SCHEDULER: BackgroundScheduler | None = None
 APPREF = None
+# Booking ids whose start job is executing in this process (skips pointless
+# re-scheduling; the status claim in _job_run_booking is what prevents double runs)
+_RUNNING: set[int] = set()
 
 log = logging.getLogger(__name__)
 
@@ -15,6 +23,8 @@ def init_scheduler(app):
     Create and start a BackgroundScheduler and stash it on the app.
     Call this once from create_app().
     """
+    from apscheduler.schedulers.background import BackgroundScheduler
+
     global SCHEDULER, APPREF
     if SCHEDULER:
         return SCHEDULER
@@ -23,38 +33,111 @@ def init_scheduler(app):
     SCHEDULER.start()
     app.extensions["scheduler"] = SCHEDULER
     log.info("APScheduler started (timezone=UTC)")
+
+    # Pick up bookings approved (or sent to "Run now") by web-only processes
+    # (APP_MODE=web) and anything lost from the in-memory job store on restart.
+    # Off by default outside APP_MODE=worker: with several scheduler processes every
+    # one of them would pick up every booking (the start-job claim keeps that safe,
+    # but each extra job is wasted work).
+    sync_every = app.config["SCHEDULER_SYNC_SECONDS"]
+    if sync_every > 0:
+        SCHEDULER.add_job(
+            _job_sync_approved,
+            "interval",
+            id="sync-approved-bookings",
+            seconds=sync_every,
+            next_run_time=datetime.now(timezone.utc),
+            replace_existing=True,
+            coalesce=True,
+        )
     return SCHEDULER
 
 
+def _job_sync_approved():
+    """
+    Schedule start jobs for approved bookings that have none in this process
+    (only those still inside the misfire window), and run bookings an admin
+    sent to "Run now" from a web-only process.
+    """
+    from sqlalchemy import update
+    from .models import db, Booking
+
+    app = APPREF
+    if not app or SCHEDULER is None:
+        return
+
+    with app.app_context():
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=300)
+        rows = (Booking.query.with_entities(Booking.id, Booking.start_at_utc)
+                .filter(Booking.status == "approved", Booking.start_at_utc >= cutoff)
+                .all())
+        added = 0
+        for booking_id, start_at_utc in rows:
+            if booking_id in _RUNNING or SCHEDULER.get_job(f"booking-{booking_id}-start"):
+                continue
+            schedule_booking_job(booking_id, start_at_utc)
+            added += 1
+        if added:
+            log.info("Sync scheduled %d approved booking(s)", added)
+
+        requested = [i for (i,) in Booking.query.with_entities(Booking.id)
+                     .filter(Booking.run_requested_at.isnot(None)).all()]
+        for booking_id in requested:
+            # Clear the request before running so it is acted on exactly once
+            claimed = db.session.execute(
+                update(Booking)
+                .where(Booking.id == booking_id, Booking.run_requested_at.isnot(None))
+                .values(run_requested_at=None)
+            ).rowcount
+            db.session.commit()
+            if claimed and booking_id not in _RUNNING:
+                _queue_run_now(booking_id)
+
+
 def _job_run_booking(booking_id: int):
     """
     Actual job body. Runs inside a Flask app context.
+
+    The booking is claimed first (approved -> starting in one conditional
+    UPDATE), so however many processes or duplicate jobs fire for it, the
+    orchestrator runs once; the rest find it already claimed and return.
     """
+    from sqlalchemy import update
     from .models import db, Booking
-    from flask import current_app
 
     app = APPREF
     if not app:
         log.error("No Flask app reference available; cannot run booking_id=%s", booking_id)
         return
 
-    with app.app_context():
-        b = Booking.query.get(booking_id)
-        if not b:
-            app.logger.error("Booking %s not found", booking_id)
-            return
-
-        app.logger.info("[JOB] Start booking_id=%s status=%s", b.id, b.status)
-        try:
-            # Call into the Azure orchestrator (stub logs by default)
-            from .azure_orchestrator import run_booking
-            run_booking(b)  # should update status/disk_name as appropriate
-            app.logger.info("[JOB] Booking %s completed with status=%s disk=%s",
-                            b.id, b.status, getattr(b, "disk_name", None))
-        except Exception as e:
-            app.logger.exception("[JOB] Booking %s failed: %s", b.id, e)
-            b.status = "failed"
+    _RUNNING.add(booking_id)
+    try:
+        with app.app_context(), profile("job:run_booking", booking_id=booking_id):
+            claimed = db.session.execute(
+                update(Booking)
+                .where(Booking.id == booking_id, Booking.status == "approved")
+                .values(status="starting")
+            ).rowcount
             db.session.commit()
+            if not claimed:
+                app.logger.info("[JOB] Booking %s not approved or already claimed; skipping", booking_id)
+                return
+
+            b = db.session.get(Booking, booking_id)
+
+            app.logger.info("[JOB] Start booking_id=%s status=%s", b.id, b.status)
+            try:
+                # Call into the Azure orchestrator (stub logs by default)
+                from .azure_orchestrator import run_booking
+                run_booking(b)  # should update status/disk_name as appropriate
+                app.logger.info("[JOB] Booking %s completed with status=%s disk=%s",
+                                b.id, b.status, getattr(b, "disk_name", None))
+            except Exception as e:
+                app.logger.exception("[JOB] Booking %s failed: %s", b.id, e)
+                b.status = "failed"
+                db.session.commit()
+    finally:
+        _RUNNING.discard(booking_id)
 
 
 def schedule_booking_job(booking_id: int, run_at_utc: datetime):
@@ -87,6 +170,20 @@ def schedule_booking_job(booking_id: int, run_at_utc: datetime):
              booking_id, run_at_utc.isoformat(), job_id)
 
 
+def _queue_run_now(booking_id: int):
+    """Run a booking on the scheduler's executor as soon as possible; its start job is left alone."""
+    SCHEDULER.add_job(
+        _job_run_booking,
+        "date",
+        id=f"booking-{booking_id}-run-now",
+        run_date=datetime.now(timezone.utc),
+        args=[booking_id],
+        replace_existing=True,
+        misfire_grace_time=300,
+    )
+    log.info("Run-now requested for booking_id=%s", booking_id)
+
+
 def run_booking_now(booking_id: int):
     """
     Convenience for the admin “Start now” button — just run immediately.
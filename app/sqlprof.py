@@ -0,0 +1,217 @@
+# app/sqlprof.py
+"""
+Opt-in SQL instrumentation (SQL_PROFILE=1).
+
+Hooks the SQLAlchemy engine and, for every request and scheduler job, records
+statement count, total DB time and the slowest statements. Requests get a
+`Server-Timing: db;dur=...` header; statements slower than SQL_SLOW_MS are
+written (sampled) to job_log with action="slow_query". Only the *shape* of the
+bound parameters (names + types) is stored, never the values — those can be
+ciphertext, HMACs or password hashes.
+"""
+from __future__ import annotations
+import contextvars
+import heapq
+import itertools
+import logging
+import random
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, request
+from sqlalchemy import event
+
+from .models import db, JobLog
+
+log = logging.getLogger(__name__)
+
+# Collector for the current request/job; None means "not profiling"
+_CURRENT: contextvars.ContextVar["QueryStats | None"] = contextvars.ContextVar("sqlprof_current", default=None)
+_SEQ = itertools.count()
+
+MAX_STATEMENT_CHARS = 2000
+
+
+def _shape(params):
+    if isinstance(params, dict):
+        return {k: type(v).__name__ for k, v in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [type(v).__name__ for v in params]
+    return type(params).__name__
+
+
+def param_shape(parameters, executemany: bool = False):
+    """
+    Describe bound parameters without their values, e.g. {"username_hmac_1": "str"}.
+    executemany batches are summarised as the row count + shape of the first row.
+    """
+    if executemany and isinstance(parameters, (list, tuple)):
+        return {"rows": len(parameters), "row": _shape(parameters[0]) if parameters else None}
+    return _shape(parameters)
+
+
+class QueryStats:
+    """Per-request / per-job accumulator. Only touched from the owning thread."""
+
+    def __init__(self, label: str, top_n: int = 5, slow_ms: float = 200.0):
+        self.label = label
+        self.top_n = max(0, top_n)  # 0 = don't keep a top list
+        self.slow_ms = slow_ms
+        self.count = 0
+        self.total_ms = 0.0
+        self.started = time.perf_counter()
+        self._top: list[tuple] = []   # min-heap of (ms, seq, statement, shape)
+        self.slow: list[dict] = []    # statements over slow_ms, in execution order
+
+    def record(self, statement: str, parameters, executemany: bool, ms: float):
+        self.count += 1
+        self.total_ms += ms
+        over = ms >= self.slow_ms
+        full = len(self._top) >= self.top_n
+        beats_top = self.top_n > 0 and (not full or ms > self._top[0][0])
+        if beats_top or over:
+            shape = param_shape(parameters, executemany)
+            if beats_top:
+                item = (ms, next(_SEQ), statement, shape)
+                if full:
+                    heapq.heapreplace(self._top, item)
+                else:
+                    heapq.heappush(self._top, item)
+            if over:
+                self.slow.append({"ms": round(ms, 2), "statement": statement[:MAX_STATEMENT_CHARS], "params": shape})
+
+    @property
+    def slowest(self) -> list[dict]:
+        return [
+            {"ms": round(ms, 2), "statement": stmt[:MAX_STATEMENT_CHARS], "params": shape}
+            for ms, _, stmt, shape in sorted(self._top, reverse=True)
+        ]
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.total_ms:.1f};desc="{self.count} queries", app;dur={self.elapsed_ms:.1f}'
+
+
+# --- Engine hooks ------------------------------------------------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the per-statement ExecutionContext rather than conn.info: a
+    # statement that raises never reaches the "after" hook, and anything left
+    # on the pooled connection would outlive it.
+    if _CURRENT.get() is not None and context is not None:
+        context._sqlprof_t0 = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _CURRENT.get()
+    t0 = getattr(context, "_sqlprof_t0", None)
+    if stats is None or t0 is None:
+        return
+    stats.record(statement, parameters, executemany, (time.perf_counter() - t0) * 1000)
+
+
+def _instrument(engine):
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# --- Reporting ---------------------------------------------------------------
+
+def _finish(stats: QueryStats, booking_id=None):
+    """Log a summary and persist sampled slow statements. Never raises."""
+    cfg = current_app.config
+    if stats.count > cfg["SQL_PROFILE_MAX_QUERIES"]:
+        log.warning("[SQL] %s issued %d queries (%.1f ms) — possible N+1; slowest: %s",
+                    stats.label, stats.count, stats.total_ms, stats.slowest[:3])
+    else:
+        log.debug("[SQL] %s: %d queries, %.1f ms", stats.label, stats.count, stats.total_ms)
+
+    if not stats.slow or random.random() >= cfg["SQL_SLOW_SAMPLE_RATE"]:
+        return
+
+    rows = [
+        {
+            "level": "WARN",
+            "action": "slow_query",
+            "booking_id": booking_id,
+            "message": q["statement"],
+            "context": {
+                "source": stats.label,
+                "ms": q["ms"],
+                "params": q["params"],
+                "unit_queries": stats.count,
+                "unit_db_ms": round(stats.total_ms, 2),
+            },
+        }
+        for q in stats.slow
+    ]
+    token = _CURRENT.set(None)  # don't profile our own insert
+    try:
+        # Separate connection so we never commit (or roll back) the caller's session
+        with db.engine.begin() as conn:
+            conn.execute(JobLog.__table__.insert(), rows)
+    except Exception as e:
+        log.warning("Failed to persist slow queries: %s", e)
+    finally:
+        _CURRENT.reset(token)
+
+
+def _request_label() -> str:
+    rule = request.url_rule.rule if request.url_rule else request.path
+    return f"{request.method} {rule}"
+
+
+@contextmanager
+def profile(label: str, booking_id=None):
+    """
+    Profile a unit of work outside a request (scheduler jobs, CLI commands).
+    No-op unless SQL_PROFILE is enabled. Must run inside an app context.
+    """
+    cfg = current_app.config
+    if not cfg.get("SQL_PROFILE"):
+        yield None
+        return
+    stats = QueryStats(label, cfg["SQL_PROFILE_TOP"], cfg["SQL_SLOW_MS"])
+    token = _CURRENT.set(stats)
+    try:
+        yield stats
+    finally:
+        _CURRENT.reset(token)
+        _finish(stats, booking_id=booking_id)
+
+
+def init_sql_profiling(app):
+    """Attach engine listeners + request hooks. Call after db.init_app()."""
+    if not app.config.get("SQL_PROFILE"):
+        return
+
+    with app.app_context():
+        for engine in db.engines.values():
+            _instrument(engine)
+
+    @app.before_request
+    def _sqlprof_start():
+        cfg = app.config
+        g._sqlprof = QueryStats(f"request:{_request_label()}", cfg["SQL_PROFILE_TOP"], cfg["SQL_SLOW_MS"])
+        _CURRENT.set(g._sqlprof)
+
+    @app.after_request
+    def _sqlprof_header(response):
+        stats = g.get("_sqlprof")
+        if stats is not None:
+            response.headers.add("Server-Timing", stats.server_timing())
+        return response
+
+    @app.teardown_request
+    def _sqlprof_finish(exc):
+        stats = g.pop("_sqlprof", None)
+        _CURRENT.set(None)
+        if stats is not None:
+            _finish(stats)
+
+    app.logger.info("SQL profiling enabled (slow>=%sms, sample=%s)",
+                    app.config["SQL_SLOW_MS"], app.config["SQL_SLOW_SAMPLE_RATE"])
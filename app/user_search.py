@@ -0,0 +1,168 @@
+# app/user_search.py
+"""
+Partial-match admin search over encrypted usernames/emails via a blind index.
+
+For every user we store keyed tokens (crypto.blind_token) of the normalized
+username and email in user_search_token:
+  - prefixes of length 1 and 2   ("jo" finds "john")
+  - every trigram                ("ohn" finds "john", "mail.c" finds emails)
+A query is turned into the same tokens; candidate users are those holding all
+of them (one indexed GROUP BY), and only those rows are decrypted and checked
+for a real substring match. The table reveals token equality, not plaintext.
+
+Tokens are kept in sync on every flush that inserts/updates/deletes a User
+(init_user_search() registers the hook). Bulk writes bypass the ORM, so
+key_rotation rebuilds tokens itself and `flask search_backfill` covers rows
+written any other way. Tokens are derived from the current HMAC_KEY only:
+after a key change, users are findable again once rotate_keys reaches them.
+"""
+from __future__ import annotations
+import logging
+import time
+import unicodedata
+
+from sqlalchemy import delete, event, func, insert, select, union
+from sqlalchemy.orm import Session
+
+from .crypto import blind_token, decrypt_field
+from .models import db, User, UserSearchToken
+from .utils import keyset_chunks
+
+log = logging.getLogger(__name__)
+
+FIELDS = {"username": "u", "email": "e"}
+MAX_VALUE_CHARS = 128
+MAX_QUERY_GRAMS = 8      # extra trigrams barely shrink the candidate set
+CANDIDATE_LIMIT = 500    # upper bound on rows decrypted per search
+
+
+def normalize(value: str | None) -> str:
+    return unicodedata.normalize("NFKC", value or "").strip().lower()[:MAX_VALUE_CHARS]
+
+
+def _index_grams(text: str) -> set[str]:
+    grams = {f"p:{text[:n]}" for n in (1, 2) if len(text) >= n}
+    grams.update(f"g:{text[i:i + 3]}" for i in range(len(text) - 2))
+    return grams
+
+
+def _query_grams(text: str) -> list[str]:
+    if len(text) < 3:
+        return [f"p:{text}"]
+    grams = sorted({f"g:{text[i:i + 3]}" for i in range(len(text) - 2)})
+    if len(grams) > MAX_QUERY_GRAMS:
+        step = len(grams) / MAX_QUERY_GRAMS
+        grams = [grams[int(i * step)] for i in range(MAX_QUERY_GRAMS)]
+    return grams
+
+
+def _tokens(field: str, grams) -> set[str]:
+    prefix = FIELDS[field]
+    return {blind_token(f"{prefix}|{g}") for g in grams}
+
+
+def user_tokens(username: str | None, email: str | None) -> set[str]:
+    return (_tokens("username", _index_grams(normalize(username)))
+            | _tokens("email", _index_grams(normalize(email))))
+
+
+def replace_tokens(conn, users) -> int:
+    """
+    Rewrite tokens for [(user_id, username, email), ...] on a Connection or Session.
+    Returns the number of token rows written.
+    """
+    users = list(users)
+    if not users:
+        return 0
+    conn.execute(delete(UserSearchToken).where(UserSearchToken.user_id.in_([u[0] for u in users])))
+    rows = [{"user_id": uid, "token": t} for uid, username, email in users for t in user_tokens(username, email)]
+    if rows:
+        conn.execute(insert(UserSearchToken), rows)
+    return len(rows)
+
+
+# --- Keep tokens in sync with ORM writes ------------------------------------
+
+def _enc_changed(user: User) -> bool:
+    state = db.inspect(user)
+    return any(state.attrs[name].history.has_changes() for name in ("username_enc", "email_enc"))
+
+
+def _sync_after_flush(session, flush_context):
+    changed = [o for o in session.new if isinstance(o, User)]
+    changed += [o for o in session.dirty if isinstance(o, User) and _enc_changed(o)]
+    deleted = [o.id for o in session.deleted if isinstance(o, User)]
+
+    conn = session.connection()
+    if deleted:
+        conn.execute(delete(UserSearchToken).where(UserSearchToken.user_id.in_(deleted)))
+    if changed:
+        replace_tokens(conn, [(u.id, decrypt_field(u.username_enc), decrypt_field(u.email_enc)) for u in changed])
+
+
+def init_user_search():
+    """Keep tokens in sync with User flushes; safe to call more than once."""
+    if not event.contains(Session, "after_flush", _sync_after_flush):
+        event.listen(Session, "after_flush", _sync_after_flush)
+
+
+# --- Query -------------------------------------------------------------------
+
+def _matching_ids(field: str, grams: list[str]):
+    tokens = _tokens(field, grams)
+    return (select(UserSearchToken.user_id)
+            .where(UserSearchToken.token.in_(tokens))
+            .group_by(UserSearchToken.user_id)
+            .having(func.count(UserSearchToken.token) == len(tokens)))
+
+
+def search_users(query: str, field: str | None = None, limit: int = 50) -> tuple[list[User], bool]:
+    """
+    Users whose username and/or email contains `query` (case-insensitive), in id
+    order, plus whether the list was cut short (more than `limit` matches, or
+    more than CANDIDATE_LIMIT token candidates).
+    field: "username", "email" or None for either.
+    """
+    text = normalize(query)
+    if not text:
+        return [], False
+    fields = [field] if field else list(FIELDS)
+    grams = _query_grams(text)
+
+    ids = [_matching_ids(f, grams) for f in fields]
+    id_query = (ids[0] if len(ids) == 1 else union(*ids)).subquery()
+    candidate_ids = db.session.execute(
+        select(id_query.c.user_id).order_by(id_query.c.user_id).limit(CANDIDATE_LIMIT + 1)
+    ).scalars().all()
+    truncated = len(candidate_ids) > CANDIDATE_LIMIT
+    if not candidate_ids:
+        return [], False
+
+    results = []
+    for user in User.query.filter(User.id.in_(candidate_ids[:CANDIDATE_LIMIT])).order_by(User.id):
+        # Tokens narrow the set; this check removes n-gram false positives
+        if any(text in normalize(getattr(user, f)) for f in fields):
+            if len(results) >= limit:
+                truncated = True
+                break
+            results.append(user)
+    return results, truncated
+
+
+# --- Backfill ----------------------------------------------------------------
+
+def backfill_tokens(chunk_size: int = 1000, progress=None) -> dict:
+    """Rebuild tokens for every user, one committed chunk of ids at a time."""
+    stats = {"users": 0, "tokens": 0, "last_id": 0, "elapsed_s": 0.0}
+    started = time.perf_counter()
+    for rows in keyset_chunks((User.id, User.username_enc, User.email_enc), User.id, chunk_size):
+        written = replace_tokens(db.session, [(r.id, decrypt_field(r.username_enc), decrypt_field(r.email_enc))
+                                              for r in rows])
+        db.session.commit()
+        last_id = rows[-1].id
+        stats.update(users=stats["users"] + len(rows), tokens=stats["tokens"] + written, last_id=last_id,
+                     elapsed_s=round(time.perf_counter() - started, 2))
+        if progress:
+            progress(dict(stats))
+    log.info("Search token backfill finished: %s", stats)
+    return stats
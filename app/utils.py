@@ -1,6 +1,9 @@
 from functools import wraps
 from flask import redirect, url_for, flash
 from flask_login import current_user
+from sqlalchemy import select
+
+from .models import db
 
 def admin_required(fn):
     @wraps(fn)
@@ -10,3 +13,18 @@ def admin_required(fn):
             return redirect(url_for("booking.index"))
         return fn(*a, **kw)
     return wrapper
+
+
+def keyset_chunks(columns, key, chunk_size: int, after=0):
+    """
+    Yield lists of up to `chunk_size` rows of `columns` in `key` order, starting
+    after `after`. Each chunk is its own `WHERE key > :last ORDER BY key LIMIT n`
+    query, so callers may commit between chunks and no cursor stays open.
+    """
+    last = after
+    while True:
+        rows = db.session.execute(select(*columns).where(key > last).order_by(key).limit(chunk_size)).all()
+        if not rows:
+            return
+        yield rows
+        last = getattr(rows[-1], key.key)
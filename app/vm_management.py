@@ -1,14 +1,16 @@
 import os
 import logging
 from flask import current_app
-from azure.identity import DefaultAzureCredential, EnvironmentCredential, AzureAuthorityHosts
-from azure.core.exceptions import HttpResponseError
-from azure.mgmt.compute import ComputeManagementClient
+
+# Azure SDK modules are imported on first use: they are slow to import and
+# add per-process memory, and most processes (web workers) never call Azure.
 
 log = logging.getLogger(__name__)
 
 
 def _credential():
+    from azure.identity import DefaultAzureCredential, EnvironmentCredential, AzureAuthorityHosts
+
     # Prefer explicit env-based SP if provided
     if os.getenv("AZURE_CLIENT_ID") and os.getenv("AZURE_TENANT_ID") and os.getenv("AZURE_CLIENT_SECRET"):
         log.info("Azure auth: EnvironmentCredential")
@@ -18,6 +20,13 @@ def _credential():
 
 
 def _compute():
+    # Local stand-in for benchmarks/dev (see app/fake_compute.py)
+    if os.getenv("AZURE_COMPUTE_FAKE") == "1":
+        from .fake_compute import get_fake_compute
+        return get_fake_compute()
+
+    from azure.mgmt.compute import ComputeManagementClient
+
     sub_id = os.environ["AZURE_SUBSCRIPTION_ID"]
     return ComputeManagementClient(_credential(), sub_id)
 
@@ -30,6 +39,8 @@ def _hdr_request_ids(poller):
 
 
 def start_vm(resource_group: str, vm_name: str):
+    from azure.core.exceptions import HttpResponseError
+
     compute = _compute()
     current_app.log_db("INFO", "start_vm", "Starting VM", vm=vm_name)
     try:
@@ -86,4 +97,6 @@ def run_workflow_for_booking(booking):
 
     steps = {}
     steps["deallocate"] = deallocate_vm(rg, vm_target)
-    steps["swap"] = attach_os_disk(rg,
+    steps["swap"] = attach_os_disk(rg, vm_target, new_disk_id)
+    steps["start"] = start_vm(rg, vm_target)
+    return steps
@@ -0,0 +1,37 @@
+# app/worker.py
+"""
+Scheduler-only process for split deployments:
+
+    APP_MODE=web    gunicorn ... app.main:app      # any number of web workers
+    python -m app.worker                           # exactly one of these
+
+Web processes never start APScheduler; this one does, and its sync job picks
+up bookings they approve.
+"""
+import os
+import signal
+import threading
+
+os.environ["APP_MODE"] = "worker"
+os.environ["RUN_SCHEDULER"] = "1"
+
+from . import create_app  # noqa: E402
+
+app = create_app()
+
+
+def main():
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    app.logger.info("Worker running (scheduler only); waiting for jobs")
+    stop.wait()
+
+    scheduler = app.extensions.get("scheduler")
+    if scheduler:
+        scheduler.shutdown(wait=True)
+    app.logger.info("Worker stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+# bench/bench_orchestration.py
+"""
+Orchestration benchmarks against the local fake Compute API (app/fake_compute.py).
+
+    python -m bench.bench_orchestration                     # all scenarios
+    python -m bench.bench_orchestration --scenario concurrency --concurrency 1,4,16 --vms 4
+    python -m bench.bench_orchestration --lro-ms 2000 --failure-rate 0.05 --json
+
+Scenarios:
+  workflow     sequential vm_management.run_workflow_for_booking() (deallocate -> swap disk -> start)
+  concurrency  the same workflow from a thread pool over --vms VMs, per concurrency level;
+               reports 409 conflicts / 429 throttles / injected failures and peak in-flight LROs
+  scheduler    --runs approved bookings in a throwaway SQLite database, each scheduled "now"
+               through app.scheduler.schedule_booking_job and run by the app's own
+               APScheduler instance (_job_run_booking); reports jobs/s and scheduling lag
+               (orchestration start - run_date)
+
+No Azure subscription is needed. workflow/concurrency need no database either: log_db is
+replaced by an in-memory counter. The booking job calls azure_orchestrator.run_booking,
+which does not call vm_management yet; the scheduler scenario wraps it so the
+vm_management workflow runs (against the fake) before the orchestrator's bookkeeping.
+"""
+from __future__ import annotations
+import argparse
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+os.environ["AZURE_COMPUTE_FAKE"] = "1"
+os.environ.setdefault("AZURE_RESOURCE_GROUP", "bench-rg")
+
+from flask import Flask  # noqa: E402
+from azure.core.exceptions import HttpResponseError  # noqa: E402
+
+from app import vm_management  # noqa: E402
+from app.fake_compute import FakeComputeClient, set_fake_compute  # noqa: E402
+from bench.common import report, summarize  # noqa: E402
+
+RG = os.environ["AZURE_RESOURCE_GROUP"]
+
+
+def _make_app() -> Flask:
+    app = Flask("bench_orchestration")
+    app.log_db_calls = 0
+    lock = threading.Lock()
+
+    def log_db(level, action, message, booking_id=None, **ctx):
+        with lock:
+            app.log_db_calls += 1
+
+    app.log_db = log_db
+    return app
+
+
+def _fresh_fake(args, vms: int) -> FakeComputeClient:
+    fake = FakeComputeClient(
+        latency_ms=args.latency_ms, lro_ms=args.lro_ms, poll_ms=args.poll_ms,
+        failure_rate=args.failure_rate, error_rate=args.error_rate,
+        max_concurrent=args.max_concurrent, auto_create=False, seed=args.seed,
+    )
+    for i in range(vms):
+        fake.add_vm(RG, f"bench-vm-{i}")
+        fake.add_disk(RG, f"bench-disk-{i}")
+    set_fake_compute(fake)
+    return fake
+
+
+def _booking(i: int, vms: int):
+    return SimpleNamespace(id=i, vm_name=f"bench-vm-{i % vms}", disk_name=f"bench-disk-{i % vms}")
+
+
+def _run_one(app: Flask, booking) -> tuple[float, str | None]:
+    """Run one workflow; return (seconds, error code or None)."""
+    t0 = time.perf_counter()
+    try:
+        with app.app_context():
+            vm_management.run_workflow_for_booking(booking)
+        return time.perf_counter() - t0, None
+    except HttpResponseError as e:
+        return time.perf_counter() - t0, getattr(e, "error_code", None) or "HttpResponseError"
+
+
+def _outcome(name: str, results, wall: float, fake: FakeComputeClient, **extra) -> dict:
+    ok = [s for s, err in results if err is None]
+    return summarize(
+        name, ok, wall,
+        failed=len(results) - len(ok),
+        conflicts=fake.stats["conflicts"],
+        throttled=fake.stats["throttled"],
+        peak_in_flight=fake.stats["peak_in_flight"],
+        arm_requests=fake.stats["requests"],
+        polls=fake.stats["polls"],
+        **extra,
+    )
+
+
+def bench_workflow(args) -> list[dict]:
+    app, fake = _make_app(), _fresh_fake(args, 1)
+    t0 = time.perf_counter()
+    results = [_run_one(app, _booking(i, 1)) for i in range(args.runs)]
+    return [_outcome("workflow", results, time.perf_counter() - t0, fake)]
+
+
+def bench_concurrency(args) -> list[dict]:
+    rows = []
+    for level in args.concurrency:
+        app, fake = _make_app(), _fresh_fake(args, args.vms)
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=level) as pool:
+            results = list(pool.map(lambda i: _run_one(app, _booking(i, args.vms)), range(args.runs)))
+        rows.append(_outcome(f"concurrency x{level}", results, time.perf_counter() - t0, fake,
+                             vms=args.vms))
+    return rows
+
+
+def _scheduler_app(args):
+    """A worker-mode app on a throwaway SQLite file, with --runs approved bookings due now."""
+    import tempfile
+    from cryptography.fernet import Fernet
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_sched_"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("DATA_ENC_KEY", Fernet.generate_key().decode())
+    os.environ.setdefault("HMAC_KEY", os.urandom(32).hex())
+    os.environ["APP_MODE"] = "worker"
+    os.environ["RUN_SCHEDULER"] = "1"
+    os.environ["SCHEDULER_SYNC_SECONDS"] = "0"  # only the jobs we schedule
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    from app import create_app
+    from app.crypto import encrypt_field, hmac_index
+    from app.models import db, Booking, User
+
+    app = create_app()
+    app.logger.setLevel(logging.CRITICAL)  # failed jobs are counted in the report, not traced
+    now = datetime.now(timezone.utc)
+    with app.app_context():
+        db.create_all()
+        user = User(username_enc=encrypt_field("bench"), email_enc=encrypt_field("bench@example.com"),
+                    username_hmac=hmac_index("bench"), email_hmac=hmac_index("bench@example.com"),
+                    password_hash="-")
+        db.session.add(user)
+        db.session.add_all(
+            Booking(user=user, status="approved", approved=True, start_at_utc=now, end_at_utc=now,
+                    vm_name=f"bench-vm-{i % args.vms}", disk_name=f"bench-disk-{i % args.vms}")
+            for i in range(args.runs)
+        )
+        db.session.commit()
+        ids = [i for (i,) in db.session.query(Booking.id).order_by(Booking.id)]
+    return app, ids
+
+
+def bench_scheduler(args) -> list[dict]:
+    app, booking_ids = _scheduler_app(args)
+    from app import azure_orchestrator, scheduler as app_scheduler
+    from app.models import Booking
+
+    fake = _fresh_fake(args, args.vms)
+    results, lags = [], []
+    lock = threading.Lock()
+    done = threading.Event()
+    run_date = datetime.now(timezone.utc)
+    orchestrate = azure_orchestrator.run_booking
+
+    def run_booking(booking):
+        lag = (datetime.now(timezone.utc) - run_date).total_seconds()
+        t0, err = time.perf_counter(), None
+        try:
+            vm_management.run_workflow_for_booking(booking)
+        except HttpResponseError as e:
+            err = getattr(e, "error_code", None) or "HttpResponseError"
+            raise  # _job_run_booking marks the booking failed
+        finally:
+            with lock:
+                lags.append(lag)
+                results.append((time.perf_counter() - t0, err))
+                if len(results) == len(booking_ids):
+                    done.set()
+        orchestrate(booking)
+
+    azure_orchestrator.run_booking = run_booking  # _job_run_booking imports it per call
+    t0 = time.perf_counter()
+    try:
+        run_date = datetime.now(timezone.utc)
+        for booking_id in booking_ids:
+            app_scheduler.schedule_booking_job(booking_id, run_date)
+        done.wait(timeout=args.timeout)
+    finally:
+        wall = time.perf_counter() - t0
+        app_scheduler.SCHEDULER.shutdown(wait=True)
+        azure_orchestrator.run_booking = orchestrate
+
+    with app.app_context():
+        finished = Booking.query.filter(Booking.status.in_(("running", "failed"))).count()
+    lags.sort()
+    return [_outcome("scheduler", results, wall, fake, vms=args.vms,
+                     completed=f"{finished}/{len(booking_ids)}",
+                     max_lag_s=round(lags[-1], 3) if lags else 0.0)]
+
+
+SCENARIOS = {"workflow": bench_workflow, "concurrency": bench_concurrency, "scheduler": bench_scheduler}
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--scenario", choices=[*SCENARIOS, "all"], default="all")
+    p.add_argument("--runs", type=int, default=20)
+    p.add_argument("--vms", type=int, default=4)
+    p.add_argument("--concurrency", type=lambda s: [int(x) for x in s.split(",")], default=[1, 4, 16])
+    p.add_argument("--latency-ms", type=float, default=20)
+    p.add_argument("--lro-ms", type=float, default=200)
+    p.add_argument("--poll-ms", type=float, default=50)
+    p.add_argument("--failure-rate", type=float, default=0.0)
+    p.add_argument("--error-rate", type=float, default=0.0)
+    p.add_argument("--max-concurrent", type=int, default=0)
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--timeout", type=float, default=600)
+    p.add_argument("--json", action="store_true")
+    args = p.parse_args(argv)
+
+    names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    rows = []
+    for name in names:
+        rows += SCENARIOS[name](args)
+    report(rows, as_json=args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# bench/bench_startup.py
+"""
+Cold-start benchmark: import + create_app() time and peak RSS per process mode.
+
+    python -m bench.bench_startup
+    python -m bench.bench_startup --runs 10 --json
+
+Each sample is a fresh interpreter so import caches don't leak between runs.
+Modes:
+  web        APP_MODE=web (no scheduler, no Azure SDK)
+  all        APP_MODE=all with the scheduler started
+  all+azure  "all" plus importing the Azure SDK modules vm_management loads on first use
+  db_init    `flask db_init` against an already-initialised SQLite schema
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from cryptography.fernet import Fernet
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CHILD = r"""
+import json, resource, sys, time
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+app = create_app()
+t2 = time.perf_counter()
+if {azure!r}:
+    import azure.identity, azure.mgmt.compute  # what vm_management._compute() pulls in
+t3 = time.perf_counter()
+if {db_init!r}:
+    app.test_cli_runner().invoke(args=["db_init"])
+t4 = time.perf_counter()
+sched = app.extensions.get("scheduler")
+if sched:
+    sched.shutdown(wait=False)
+print(json.dumps({{
+    "import_ms": (t1 - t0) * 1000,
+    "create_app_ms": (t2 - t1) * 1000,
+    "azure_import_ms": (t3 - t2) * 1000,
+    "db_init_ms": (t4 - t3) * 1000,
+    "total_ms": (t4 - t0) * 1000,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "modules": len(sys.modules),
+    "azure_loaded": any(m.startswith("azure") for m in sys.modules),
+    "apscheduler_loaded": "apscheduler" in sys.modules,
+}}))
+"""
+
+MODES = {
+    "web": ({"APP_MODE": "web"}, False, False),
+    "all": ({"APP_MODE": "all", "RUN_SCHEDULER": "1"}, False, False),
+    "all+azure": ({"APP_MODE": "all", "RUN_SCHEDULER": "1"}, True, False),
+    "db_init": ({"APP_MODE": "web"}, False, True),
+}
+
+
+def _sample(env: dict, azure: bool, db_init: bool) -> dict:
+    code = _CHILD.format(azure=azure, db_init=db_init)
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument("--mode", action="append", choices=list(MODES), help="repeatable; default all modes")
+    p.add_argument("--json", action="store_true")
+    args = p.parse_args(argv)
+
+    from bench.common import report
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="bench_startup_"), "bench.db")
+    base = dict(os.environ)
+    base.update({
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "DATA_ENC_KEY": base.get("DATA_ENC_KEY") or Fernet.generate_key().decode(),
+        "HMAC_KEY": base.get("HMAC_KEY") or os.urandom(32).hex(),
+        "SCHEDULER_SYNC_SECONDS": "0",
+        "LOG_LEVEL": "WARNING",
+    })
+    # Initialise the schema once so db_init samples measure the "already current" path
+    _sample({**base, "APP_MODE": "web"}, False, True)
+
+    rows = []
+    for mode in args.mode or list(MODES):
+        extra_env, azure, db_init = MODES[mode]
+        samples = [_sample({**base, **extra_env}, azure, db_init) for _ in range(args.runs)]
+        med = lambda k: round(statistics.median(s[k] for s in samples), 1)  # noqa: E731
+        rows.append({
+            "mode": mode,
+            "runs": args.runs,
+            "import_ms": med("import_ms"),
+            "create_app_ms": med("create_app_ms"),
+            "azure_import_ms": med("azure_import_ms"),
+            "db_init_ms": med("db_init_ms"),
+            "total_ms": med("total_ms"),
+            "max_rss_mb": med("max_rss_mb"),
+            "modules": samples[-1]["modules"],
+            "azure_loaded": samples[-1]["azure_loaded"],
+            "apscheduler_loaded": samples[-1]["apscheduler_loaded"],
+        })
+    report(rows, as_json=args.json)
+
+
+if __name__ == "__main__":
+    main()
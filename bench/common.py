@@ -0,0 +1,44 @@
+# bench/common.py
+"""Small helpers shared by the benchmark scripts (stdlib only)."""
+from __future__ import annotations
+import json
+import math
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty sample."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(name: str, latencies_s: list[float], wall_s: float, **extra) -> dict:
+    """Throughput + latency percentiles (ms) for one scenario."""
+    ms = [x * 1000 for x in latencies_s]
+    row = {
+        "scenario": name,
+        "n": len(ms),
+        "wall_s": round(wall_s, 3),
+        "ops_per_s": round(len(ms) / wall_s, 2) if wall_s else 0.0,
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "max_ms": round(max(ms), 2) if ms else 0.0,
+    }
+    row.update(extra)
+    return row
+
+
+def report(rows: list[dict], as_json: bool = False):
+    if as_json:
+        print(json.dumps(rows, indent=2))
+        return
+    cols = []
+    for r in rows:
+        cols += [k for k in r if k not in cols]
+    widths = {c: max(len(c), *(len(str(r.get(c, ""))) for r in rows)) for c in cols}
+    print("  ".join(c.ljust(widths[c]) for c in cols))
+    for r in rows:
+        print("  ".join(str(r.get(c, "")).ljust(widths[c]) for c in cols))
@@ -0,0 +1,57 @@
+import os
+
+import pytest
+from cryptography.fernet import Fernet
+
+# Read at import time by app.extensions / create_app
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ["APP_MODE"] = "web"
+os.environ["RUN_SCHEDULER"] = "0"
+os.environ["DEFAULT_RATE_LIMITS"] = ""
+os.environ["LOG_LEVEL"] = "WARNING"
+
+from app import crypto  # noqa: E402
+
+
+def set_keys(monkeypatch, data_key, hmac_key, old_data_keys=(), old_hmac_keys=()):
+    """Point app.crypto at new keys and drop its cached key material."""
+    monkeypatch.setenv("DATA_ENC_KEY", data_key)
+    monkeypatch.setenv("HMAC_KEY", hmac_key)
+    monkeypatch.setenv("DATA_ENC_OLD_KEYS", ",".join(old_data_keys))
+    monkeypatch.setenv("HMAC_OLD_KEYS", ",".join(old_hmac_keys))
+    for name in ("_DATA_KEYS", "_FERNET", "_PRIMARY_FERNET", "_HMAC_KEYS", "_SEARCH_KEY"):
+        monkeypatch.setattr(crypto, name, None)
+
+
+@pytest.fixture
+def keys(monkeypatch):
+    data_key, hmac_key = Fernet.generate_key().decode(), os.urandom(32).hex()
+    set_keys(monkeypatch, data_key, hmac_key)
+    return data_key, hmac_key
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch, keys):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+    from app import create_app
+    from app.models import db
+
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+def make_user(name, email=None, role="user"):
+    from app.crypto import encrypt_field, hmac_index
+    from app.models import db, User
+
+    email = email or f"{name}@example.com"
+    user = User(username_enc=encrypt_field(name), email_enc=encrypt_field(email),
+                username_hmac=hmac_index(name), email_hmac=hmac_index(email),
+                password_hash="-", role=role)
+    db.session.add(user)
+    db.session.commit()
+    return user
@@ -0,0 +1,103 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from app import analytics
+from app.models import db, Booking, BookingDailyStats
+
+COLS = (*analytics.SUM_COLS, *analytics.MAX_COLS)
+
+
+def _rollup():
+    return {r.day: {c: getattr(r, c) for c in COLS} for r in BookingDailyStats.query}
+
+
+def _assert_matches_rebuild():
+    """Incremental rollup == full rebuild (maxima may only be higher: they are never retracted)."""
+    incremental = _rollup()
+    analytics.rebuild_rollups(chunk_size=3)
+    rebuilt = _rollup()
+    zero = dict.fromkeys(COLS, 0)
+    for day in set(incremental) | set(rebuilt):
+        inc, reb = incremental.get(day, zero), rebuilt.get(day, zero)
+        for col in analytics.SUM_COLS:
+            assert abs(inc[col] - reb[col]) < 1e-6, (day, col, inc[col], reb[col])
+        for col in analytics.MAX_COLS:
+            assert inc[col] >= reb[col] - 1e-6, (day, col, inc[col], reb[col])
+
+
+def _booking(start, hours=2, **kw):
+    b = Booking(start_at_utc=start, end_at_utc=start + timedelta(hours=hours), status="pending", **kw)
+    db.session.add(b)
+    db.session.commit()
+    return b
+
+
+def test_lifecycle_rollup(app):
+    created = datetime(2026, 3, 1, 9, 0, tzinfo=timezone.utc)
+    start = datetime(2026, 3, 4, 23, 0, tzinfo=timezone.utc)  # crosses midnight
+    b = _booking(start, hours=3, created_at=created)
+
+    b.status, b.approved_at = "approved", created + timedelta(minutes=10)
+    db.session.commit()
+    b.status, b.started_at_utc = "running", start + timedelta(seconds=90)
+    db.session.commit()
+
+    rows = _rollup()
+    assert rows[created.date()]["requested"] == 1
+    assert rows[created.date()]["approved"] == 1
+    assert rows[created.date()]["approval_latency_sum_s"] == 600
+    assert rows[start.date()]["booked"] == 1
+    assert rows[start.date()]["booked_hours"] == 1
+    assert rows[start.date() + timedelta(days=1)]["booked_hours"] == 2
+    assert rows[start.date()]["start_delay_sum_s"] == 90
+    _assert_matches_rebuild()
+
+
+def test_random_changes_match_rebuild(app):
+    rng = random.Random(7)
+    base = datetime(2026, 5, 10, tzinfo=timezone.utc)
+    bookings = [_booking(base + timedelta(hours=rng.randint(-96, 96)), hours=rng.choice([1, 2, 5]),
+                         created_at=base - timedelta(hours=rng.randint(1, 72)))
+                for _ in range(30)]
+
+    for b in bookings:
+        roll = rng.random()
+        if roll < 0.6:
+            b.status = "approved"
+            b.approved_at = b.created_at + timedelta(seconds=rng.randint(1, 5000))
+        elif roll < 0.8:
+            b.status = "rejected"
+        db.session.commit()
+
+    for b in bookings:
+        if b.status == "approved" and rng.random() < 0.6:
+            b.status = rng.choice(["running", "failed"])
+            b.started_at_utc = b.start_at_utc + timedelta(seconds=rng.randint(0, 300))
+            db.session.commit()
+        if rng.random() < 0.3:  # reschedule
+            shift = timedelta(hours=rng.randint(-30, 30))
+            b.start_at_utc, b.end_at_utc = b.start_at_utc + shift, b.end_at_utc + shift
+            db.session.commit()
+
+    # Changes to expired (reloaded) instances must still subtract the old values
+    db.session.expire_all()
+    for b in bookings[:5]:
+        b.status = "rejected"
+    for b in bookings[5:8]:
+        db.session.delete(b)
+    db.session.commit()
+
+    _assert_matches_rebuild()
+
+
+def test_report_groups_by_month(app):
+    start = datetime(2026, 1, 30, 10, 0, tzinfo=timezone.utc)
+    for day in range(4):  # Jan 30 .. Feb 2
+        b = _booking(start + timedelta(days=day), hours=6)
+        b.status, b.approved_at = "approved", b.created_at
+        db.session.commit()
+
+    rows = analytics.report(start.date(), start.date() + timedelta(days=3), group="month", pool_size=1)
+    assert [r["period"] for r in rows] == ["2026-01", "2026-02"]
+    assert [r["booked_hours"] for r in rows] == [12, 12]
+    assert [r["utilization_pct"] for r in rows] == [25.0, 25.0]
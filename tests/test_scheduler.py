@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from app import azure_orchestrator, scheduler
+from app.models import db, Booking
+
+from .conftest import make_user
+
+
+@pytest.fixture
+def sched(app, monkeypatch):
+    """Scheduler globals pointed at the test app; jobs stay pending (never started)."""
+    pending = BackgroundScheduler(timezone="UTC")
+    monkeypatch.setattr(scheduler, "APPREF", app)
+    monkeypatch.setattr(scheduler, "SCHEDULER", pending)
+    return pending
+
+
+@pytest.fixture
+def orchestrations(monkeypatch):
+    calls = []
+
+    def run_booking(booking):
+        calls.append(booking.id)
+        booking.status = "running"
+        db.session.commit()
+
+    monkeypatch.setattr(azure_orchestrator, "run_booking", run_booking)
+    return calls
+
+
+def _approved_booking():
+    start = datetime.now(timezone.utc) + timedelta(minutes=5)
+    b = Booking(user=make_user("alice"), status="approved", start_at_utc=start,
+                end_at_utc=start + timedelta(hours=1))
+    db.session.add(b)
+    db.session.commit()
+    return b.id
+
+
+def test_sync_during_executing_job_runs_once(app, sched, orchestrations, monkeypatch):
+    booking_id = _approved_booking()
+    scheduler._job_sync_approved()
+    job_id = f"booking-{booking_id}-start"
+    assert sched.get_job(job_id)
+
+    # APScheduler drops a due date job from its store when it dispatches it;
+    # a sync before the pool thread starts sees neither the job nor _RUNNING.
+    sched.remove_job(job_id)
+    scheduler._job_sync_approved()
+    assert sched.get_job(job_id)  # duplicate queued
+
+    # Sync again while the first dispatch is orchestrating
+    orchestrate = azure_orchestrator.run_booking
+
+    def run_and_sync(booking):
+        sched.remove_job(job_id)  # the duplicate is dispatched too
+        scheduler._job_sync_approved()
+        assert sched.get_job(job_id) is None  # the claimed booking is not queued again...
+        orchestrate(booking)
+
+    monkeypatch.setattr(azure_orchestrator, "run_booking", run_and_sync)
+    scheduler._job_run_booking(booking_id)
+    scheduler._job_run_booking(booking_id)  # ...and the duplicate finds it claimed
+
+    assert orchestrations == [booking_id]
+    db.session.expire_all()
+    assert db.session.get(Booking, booking_id).status == "running"
+
+
+def test_concurrent_dispatches_orchestrate_once(app, sched, orchestrations):
+    """Same booking fired by two scheduler processes (e.g. two APP_MODE=all workers)."""
+    booking_id = _approved_booking()
+    scheduler._job_run_booking(booking_id)
+    scheduler._job_run_booking(booking_id)
+    assert orchestrations == [booking_id]
+
+
+def test_failed_orchestration_marks_booking_failed(app, sched, monkeypatch):
+    booking_id = _approved_booking()
+
+    def boom(booking):
+        assert booking.status == "starting"
+        raise RuntimeError("deallocate failed")
+
+    monkeypatch.setattr(azure_orchestrator, "run_booking", boom)
+    scheduler._job_run_booking(booking_id)
+    db.session.expire_all()
+    assert db.session.get(Booking, booking_id).status == "failed"
@@ -0,0 +1,57 @@
+from app import user_search
+from app.models import db, UserSearchToken
+from app.user_search import search_users
+
+from .conftest import make_user
+
+
+def _names(result):
+    users, _ = result
+    return sorted(u.username for u in users)
+
+
+def test_trigram_false_positives_are_dropped(app):
+    make_user("xabcdx")
+    make_user("abc_bcd")  # holds both trigrams of "abcd", but not the substring
+    make_user("zzz")
+
+    assert _names(search_users("abcd")) == ["xabcdx"]
+    assert _names(search_users("bcd")) == ["abc_bcd", "xabcdx"]
+
+
+def test_short_queries_match_prefixes_and_fields(app):
+    make_user("john", email="j.smith@corp.example")
+    make_user("ajo", email="ajo@other.example")
+
+    assert _names(search_users("jo")) == ["john"]
+    assert _names(search_users("JOHN")) == ["john"]
+    assert _names(search_users("corp", field="email")) == ["john"]
+    assert _names(search_users("corp", field="username")) == []
+
+
+def test_tokens_follow_updates_and_deletes(app):
+    from app.crypto import encrypt_field
+
+    user = make_user("carol")
+    user.username_enc = encrypt_field("dave")
+    db.session.commit()
+    assert _names(search_users("carol", field="username")) == []  # email still says carol
+    assert _names(search_users("dave")) == ["dave"]
+
+    db.session.delete(user)
+    db.session.commit()
+    assert UserSearchToken.query.count() == 0
+
+
+def test_truncated_results_are_flagged(app, monkeypatch):
+    for i in range(5):
+        make_user(f"team{i}")
+    users, truncated = search_users("team", limit=3)
+    assert [u.username for u in users] == ["team0", "team1", "team2"] and truncated
+
+    monkeypatch.setattr(user_search, "CANDIDATE_LIMIT", 2)
+    users, truncated = search_users("team")
+    assert [u.username for u in users] == ["team0", "team1"] and truncated
+
+    users, truncated = search_users("team4")
+    assert [u.username for u in users] == ["team4"] and not truncated